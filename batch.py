@@ -0,0 +1,179 @@
+#! python3
+"""Vectorized simulator that plays many domino games in lockstep.
+
+All games of a batch are kept as NumPy arrays - hand masks, snake end
+numbers, number counts in the snake, the dealt decks with a pointer to the
+top of the stock and the seat to move - and every step plays one turn of all
+unfinished games at once, without a Python loop over the games.
+
+The rules and the "rarity" policy are the same as in the engine module, so a
+game played from the same deck by play_batch and by engine.play_game with
+RarityStrategy seats has the same outcome.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from engine import HAND_SIZE
+from tiles import MAX_PIP, TILES, TILE_COUNT, TILE_PIPS
+
+WIN, DRAW, BLOCKED = 0, 1, 2
+REASONS = ("win", "draw", "blocked")
+POLICIES = ("rarity", "random")
+
+TILE_A = np.array([a for a, b in TILES])
+TILE_B = np.array([b for a, b in TILES])
+DOUBLE_IDS = np.flatnonzero(TILE_A == TILE_B)
+PIP_VALUES = np.array(TILE_PIPS)
+# HOLDS[p, t] - domino t holds number p
+HOLDS = np.array([[pip in tile for tile in TILES]
+                  for pip in range(MAX_PIP + 1)])
+# INCIDENCE[t, p] - how many times number p appears on domino t
+INCIDENCE = (HOLDS.T * (1 + (TILE_A == TILE_B))[:, None]).astype(np.int16)
+STOCK_BOTTOM = 2 * HAND_SIZE
+
+BatchResult = namedtuple("BatchResult", ["winner", "reason", "turns", "pips"])
+BatchResult.__doc__ = """Outcomes of a batch of games as arrays.
+
+winner - winning seat (0 or 1) or -1 for a draw,
+reason - WIN, DRAW or BLOCKED (see REASONS),
+turns - number of turns played after the starting double,
+pips - remaining pip totals of both seats, shaped (n, 2).
+"""
+
+
+def deal_batch(n, rng):
+    """Shuffle 'n' decks so that a double is dealt in each of them.
+
+    Returns:
+        numpy.ndarray: domino ids in dealing order, shaped (n, TILE_COUNT).
+    """
+    decks = rng.permuted(np.tile(np.arange(TILE_COUNT), (n, 1)), axis=1)
+    while True:
+        dealt = decks[:, :STOCK_BOTTOM]
+        redeal = np.flatnonzero(~(TILE_A[dealt] == TILE_B[dealt]).any(axis=1))
+        if not redeal.size:
+            return decks
+        decks[redeal] = rng.permuted(decks[redeal], axis=1)
+
+
+def play_batch(n=None, seed=None, decks=None, policies=("rarity", "rarity")):
+    """Play a batch of games in lockstep.
+
+    Arguments:
+        n(int): number of games, ignored when 'decks' are given;
+        seed: seed for numpy random generator (default None);
+        decks(array-like): domino ids in dealing order shaped (n, TILE_COUNT),
+            see engine.deal function (default None);
+        policies(tuple): policy of seat 0 and seat 1, 'rarity' or 'random'.
+
+    Returns:
+        BatchResult: outcomes of all games.
+
+    Raises:
+        ValueError: when a policy is unknown or a deck deals no double;
+    """
+    for policy in policies:
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy '{policy}'. "
+                             f"Valid options are {', '.join(POLICIES)}.")
+
+    rng = np.random.default_rng(seed)
+    if decks is None:
+        decks = deal_batch(n, rng)
+    else:
+        decks = np.asarray(decks, dtype=np.intp)
+        dealt = decks[:, :STOCK_BOTTOM]
+        if not (TILE_A[dealt] == TILE_B[dealt]).any(axis=1).all():
+            raise ValueError("No double domino was dealt from a deck.")
+    n = len(decks)
+    games = np.arange(n)
+
+    hands = np.zeros((n, 2, TILE_COUNT), dtype=bool)
+    hands[games[:, None], 0, decks[:, :HAND_SIZE]] = True
+    hands[games[:, None], 1, decks[:, HAND_SIZE:STOCK_BOTTOM]] = True
+
+    # The largest double starts and the other seat moves first
+    held = hands[:, :, DOUBLE_IDS].any(axis=1)
+    pip = len(DOUBLE_IDS) - 1 - held[:, ::-1].argmax(axis=1)
+    seat = hands[games, 1, DOUBLE_IDS[pip]].astype(np.intp)
+    hands[games, seat, DOUBLE_IDS[pip]] = False
+
+    left = pip.copy()
+    right = pip.copy()
+    counts = np.zeros((n, MAX_PIP + 1), dtype=np.int16)
+    counts[games, pip] = 2
+    turn = 1 - seat
+    stock_top = np.full(n, TILE_COUNT - 1)
+    passes = np.zeros(n, dtype=np.int8)
+    turns = np.zeros(n, dtype=np.int32)
+    winner = np.full(n, -1, dtype=np.int8)
+    reason = np.full(n, -1, dtype=np.int8)
+    random_seat = np.array([policy == "random" for policy in policies])
+
+    active = games
+    while active.size:
+        seat = turn[active]
+        hand = hands[active, seat]
+        end_l, end_r = left[active], right[active]
+        turns[active] += 1
+
+        if random_seat.all():
+            score = rng.random(hand.shape)
+        else:
+            pips = counts[active] + hand @ INCIDENCE
+            score = pips[:, TILE_A] + pips[:, TILE_B]
+            if random_seat.any():
+                rolls = np.flatnonzero(random_seat[seat])
+                score = score.astype(float)
+                score[rolls] = rng.random((rolls.size, TILE_COUNT))
+
+        # Right placements of all dominoes come before the left ones
+        legal_r = hand & HOLDS[end_r]
+        legal_l = hand & HOLDS[end_l] & (end_l != end_r)[:, None]
+        scores = np.concatenate([np.where(legal_r, score, -1),
+                                 np.where(legal_l, score, -1)], axis=1)
+        choice = scores.argmax(axis=1)
+        has_move = legal_r.any(axis=1) | legal_l.any(axis=1)
+
+        # Place the chosen dominoes
+        moved = active[has_move]
+        tile = choice[has_move] % TILE_COUNT
+        on_left = choice[has_move] >= TILE_COUNT
+        mover = seat[has_move]
+        hands[moved, mover, tile] = False
+        a, b = TILE_A[tile], TILE_B[tile]
+        counts[moved, a] += 1
+        counts[moved, b] += 1
+        end = np.where(on_left, left[moved], right[moved])
+        new_end = np.where(a == end, b, a)
+        left[moved] = np.where(on_left, new_end, left[moved])
+        right[moved] = np.where(on_left, right[moved], new_end)
+        passes[moved] = 0
+
+        won = ~hands[moved, mover].any(axis=1)
+        winner[moved[won]] = mover[won]
+        reason[moved[won]] = WIN
+        drawn = ~won & (left[moved] == right[moved]) \
+            & (counts[moved, left[moved]] == 2 + MAX_PIP)
+        reason[moved[drawn]] = DRAW
+
+        # Draw from the stock or pass
+        stuck = active[~has_move]
+        can_draw = stock_top[stuck] >= STOCK_BOTTOM
+        drawing = stuck[can_draw]
+        hands[drawing, turn[drawing], decks[drawing, stock_top[drawing]]] = True
+        stock_top[drawing] -= 1
+        passes[drawing] = 0
+        passing = stuck[~can_draw]
+        passes[passing] += 1
+        reason[passing[passes[passing] == 2]] = BLOCKED
+
+        turn[active] ^= 1
+        active = active[reason[active] < 0]
+
+    pips = hands @ PIP_VALUES
+    blocked = np.flatnonzero((reason == BLOCKED) & (pips[:, 0] != pips[:, 1]))
+    winner[blocked] = pips[blocked].argmin(axis=1)
+
+    return BatchResult(winner, reason, turns, pips)
@@ -0,0 +1,297 @@
+#! python3
+"""Benchmarks of the hot paths of the domino game.
+
+Every benchmark is timed with timeit: the number of calls is chosen so that
+a measurement takes at least 0.2 s, the measurement is repeated and the
+fastest one is reported. Results are written as JSON and can be compared
+with a stored baseline; a benchmark slower than the baseline by more than
+the threshold is reported as a regression and the exit status is 1.
+
+The startup benchmark measures the time from importing dominoes to the
+first move in a new interpreter, which every CLI run and short-lived worker
+pays, and counts the modules imported on the way. It also checks that NumPy,
+needed only by the batch and vectorized modules, is not imported. A new
+interpreter is much noisier than the other benchmarks, so the median of
+the runs is reported, its time is compared with the wider
+'--startup-threshold' and any module imported on top of the baseline is a
+regression. Run it with compiled bytecode (e.g. after python -m
+compileall), like an installed game.
+
+Usage:
+    python benchmark.py --output results.json
+    python benchmark.py startup --max-startup 20
+    python benchmark.py --save benchmark_baseline.json
+    python benchmark.py --compare benchmark_baseline.json --threshold 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import timeit
+
+from dominoes import DominoGame, DominoSet, Snake
+from engine import RarityStrategy
+from engine import play_game
+
+BENCHMARKS = {}
+STARTUP = "startup"
+STARTUP_CODE = """
+import sys
+import time
+modules = len(sys.modules)
+start = time.perf_counter()
+from dominoes import DominoGame
+from engine import RarityStrategy
+game = DominoGame()
+game.make_move(game.get_strategy_command(RarityStrategy()))
+print(time.perf_counter() - start, "numpy" in sys.modules,
+      len(sys.modules) - modules)
+"""
+
+
+def benchmark(name):
+    """Register a function making the callable to be timed."""
+    def register(make):
+        BENCHMARKS[name] = make
+        return make
+    return register
+
+
+def make_game(seed=0, turns=5):
+    """Make a DominoGame in the middle of play.
+
+    The game is played for at least 'turns' turns until the computer is to
+    move with a choice of moves; games ending sooner are dealt again.
+    """
+    random.seed(seed)
+    strategy = RarityStrategy()
+    while True:
+        game = DominoGame()
+        turn = 0
+        while game.do_play_game()[0]:
+            if turn >= turns and game.status == "computer" \
+                    and len(game.get_legal_moves()) > 1:
+                return game
+            game.make_move(game.get_strategy_command(strategy))
+            turn += 1
+
+
+@benchmark("domino_set")
+def bench_domino_set():
+    return DominoSet
+
+
+@benchmark("get_part")
+def bench_get_part():
+    def deal():
+        domino_set = DominoSet()
+        domino_set.get_part(7)
+        domino_set.get_part(7)
+    return deal
+
+
+@benchmark("new_game")
+def bench_new_game():
+    return DominoGame
+
+
+@benchmark("move_domino")
+def bench_move_domino():
+    source, target = DominoSet(), DominoSet([])
+    domino = source.dominoes[10]
+
+    def move():
+        DominoGame.move_domino(domino, source, target)
+        DominoGame.move_domino(domino, target, source)
+    return move
+
+
+@benchmark("snake_add_domino")
+def bench_snake_add_domino():
+    pieces = [piece for piece in DominoSet().dominoes if 0 in piece.numbers]
+
+    def build():
+        snake = Snake()
+        for piece in pieces:
+            snake.add_domino(piece, "R" if piece.numbers[0] else "L")
+    return build
+
+
+@benchmark("get_domino_scores")
+def bench_get_domino_scores():
+    return make_game().get_domino_scores
+
+
+@benchmark("get_computer_command")
+def bench_get_computer_command():
+    return make_game().get_computer_command
+
+
+@benchmark("do_play_game")
+def bench_do_play_game():
+    return make_game().do_play_game
+
+
+@benchmark("headless_game")
+def bench_headless_game():
+    strategies = [RarityStrategy(), RarityStrategy()]
+    seeds = iter(range(sys.maxsize))
+    return lambda: play_game(strategies, next(seeds))
+
+
+def measure_startup(repeat=5):
+    """Measure the time from importing dominoes to the first move.
+
+    Every measurement starts a new interpreter in the directory of this
+    module.
+
+    Returns:
+        tuple: the median time in seconds, whether NumPy was imported and
+            the number of imported modules.
+    """
+    times = []
+    numpy_imported = False
+    modules = 0
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_CODE], capture_output=True,
+            check=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()
+        times.append(float(output[0]))
+        numpy_imported = numpy_imported or output[1] == "True"
+        modules = max(modules, int(output[2]))
+    return statistics.median(times), numpy_imported, modules
+
+
+def run(names=None, repeat=5, min_time=0.2):
+    """Run benchmarks.
+
+    Arguments:
+        names(list): names of the benchmarks to run, STARTUP included
+            (default None - all);
+        repeat(int): number of measurements of every benchmark;
+        min_time(float): minimum duration of a measurement in seconds.
+
+    Returns:
+        dict: results with 'calls_per_sec' and 'usec_per_call' of every
+            benchmark under 'benchmarks'.
+    """
+    results = {}
+    for name in names or [*BENCHMARKS, STARTUP]:
+        if name == STARTUP:
+            median, numpy_imported, modules = measure_startup(repeat)
+            results[name] = {"calls_per_sec": 1 / median,
+                             "usec_per_call": median * 1e6,
+                             "numpy_imported": numpy_imported,
+                             "modules": modules}
+            continue
+
+        timer = timeit.Timer(BENCHMARKS[name]())
+        number = 1
+        while timer.timeit(number) < min_time:
+            number *= 2
+        best = min(timer.repeat(repeat, number)) / number
+        results[name] = {"calls_per_sec": 1 / best,
+                         "usec_per_call": best * 1e6}
+
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "benchmarks": results,
+    }
+
+
+def compare(results, baseline, threshold=0.2, startup_threshold=1.0):
+    """Compare results with a baseline.
+
+    The startup time is compared with 'startup_threshold' (1.0 - 100%).
+    Its number of imported modules, which does not depend on the load of
+    the machine, is compared exactly when both results come from the same
+    Python version.
+
+    Returns:
+        list: (name, ratio) of benchmarks whose time per call grew by more
+            than 'threshold' (0.2 - 20%); the ratio is new time / old time.
+            More imported modules are reported as ('startup modules',
+            new number / old number).
+    """
+    regressions = []
+    old = baseline["benchmarks"]
+    for name, result in results["benchmarks"].items():
+        if name in old:
+            limit = startup_threshold if name == STARTUP else threshold
+            ratio = result["usec_per_call"] / old[name]["usec_per_call"]
+            if ratio > 1 + limit:
+                regressions.append((name, ratio))
+
+    startup, old_startup = results["benchmarks"].get(STARTUP), old.get(STARTUP)
+    if startup is not None and old_startup is not None \
+            and "modules" in old_startup \
+            and results.get("python") == baseline.get("python") \
+            and startup["modules"] > old_startup["modules"]:
+        regressions.append((f"{STARTUP} modules",
+                            startup["modules"] / old_startup["modules"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("names", nargs="*", metavar="NAME",
+                        help=f"benchmarks to run: {', '.join(BENCHMARKS)}, "
+                             f"{STARTUP} (default all)")
+    parser.add_argument("--output", help="write the results to a JSON file")
+    parser.add_argument("--save", metavar="PATH",
+                        help="store the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH",
+                        help="compare the results with a baseline")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--startup-threshold", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-startup", type=float, metavar="MS",
+                        help="fail when the startup takes longer")
+    args = parser.parse_args()
+    unknown = set(args.names) - set(BENCHMARKS) - {STARTUP}
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    results = run(args.names, args.repeat)
+    for name, result in results["benchmarks"].items():
+        print(f"{name:24}{result['calls_per_sec']:14,.0f} calls/s"
+              f"{result['usec_per_call']:12.2f} us/call")
+
+    for path in (args.output, args.save):
+        if path is not None:
+            with open(path, "w") as file:
+                json.dump(results, file, indent=2)
+
+    failed = False
+    startup = results["benchmarks"].get(STARTUP)
+    if startup is not None:
+        if startup["numpy_imported"]:
+            print("Regression: NumPy is imported before the first move.")
+            failed = True
+        milliseconds = startup["usec_per_call"] / 1000
+        if args.max_startup is not None and milliseconds > args.max_startup:
+            print(f"Regression: the startup takes {milliseconds:.1f} ms, "
+                  f"more than {args.max_startup:g} ms.")
+            failed = True
+
+    if args.compare is not None:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold,
+                              args.startup_threshold)
+        for name, ratio in regressions:
+            print(f"Regression: {name} is {ratio:.2f}x the baseline.")
+        failed = failed or bool(regressions)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#! python3
+"""Persistent cache of position evaluations shared by processes.
+
+Evaluations are stored in an SQLite database in WAL mode, so any number of
+processes can read the cache while one of them writes, and later runs start
+with the evaluations of the earlier ones. Each process opens its own
+connection on first use; a pickled cache (e.g. sent to a worker with its
+strategy) reconnects in the worker.
+
+Positions are keyed by a canonical encoding from the view of the seat to
+move, so both seats share entries:
+- the hand of the seat to move (and of the other seat when it is known),
+- the dominoes in the snake,
+- the numbers on the ends of the snake, ordered; a snake with the larger
+  number on the left is mirrored and so are the sides of the moves,
+- the sizes of the other hand and of the stock, and the passes in a row.
+
+When the cache holds more than 'max_entries' entries, the least recently
+used ones are evicted. A hit does not write to the database: the times of
+use are collected and written in one transaction with the next store, before
+an eviction and on close, so readers do not wait for each other.
+"""
+import contextlib
+import json
+import os
+import sqlite3
+import time
+
+from records import DRAW_CODE
+from records import encode_move
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+"""
+
+
+def encode_moves(moves, mirrored):
+    """Get move codes of moves, with mirrored sides if 'mirrored'."""
+    codes = [encode_move(move) for move in moves]
+    if mirrored:
+        codes = [code ^ 1 if code < DRAW_CODE else code for code in codes]
+    return codes
+
+
+def get_key(namespace, hands, played, left, right, sizes, moves):
+    """Get the canonical key of a position and its candidate moves.
+
+    Arguments:
+        namespace(str): kind of the evaluation, e.g. "montecarlo";
+        hands(tuple): known hand masks, the seat to move first;
+        played(int): mask of dominoes in the snake;
+        left, right(int): numbers on the ends of the snake or None;
+        sizes(tuple): other numbers identifying the position, like the
+            sizes of the other hand and of the stock;
+        moves(list): candidate moves.
+
+    Returns:
+        tuple: the key and the move codes in the canonical order of
+            'moves'.
+    """
+    mirrored = left is not None and left > right
+    if mirrored:
+        left, right = right, left
+    codes = encode_moves(moves, mirrored)
+    fields = [namespace, *(f"{hand:x}" for hand in hands), f"{played:x}",
+              "-" if left is None else f"{left}:{right}",
+              *map(str, sizes), ",".join(map(str, sorted(codes)))]
+    return "/".join(fields), codes
+
+
+def get_view_key(namespace, view, moves):
+    """Get the canonical key of a montecarlo View and its moves."""
+    return get_key(namespace, (view.hand,), view.played, view.left,
+                   view.right, (view.opponent_size, view.stock_size), moves)
+
+
+def get_state_key(namespace, state, moves):
+    """Get the canonical key of a fully known GameState and its moves."""
+    hands = (state.hands[state.turn], state.hands[1 - state.turn])
+    return get_key(namespace, hands, state.played, state.left, state.right,
+                   (len(state.stock), state.passes), moves)
+
+
+class EvaluationCache:
+    """A size-bounded key-value store of JSON values in an SQLite file."""
+
+    def __init__(self, path, max_entries=1000000, timeout=30.0):
+        """Initialize a cache.
+
+        Arguments:
+            path(str): path of the database file, created when missing;
+            max_entries(int): number of entries kept at most;
+            timeout(float): seconds to wait for a lock held by another
+                process.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.hits = self.misses = self.stores = self.evictions = 0
+        self._connection = None
+        self._pid = None
+        self._stores_since_check = 0
+        self._used = {}
+
+    def __getstate__(self):
+        """Drop the connection when the cache is pickled."""
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        state["_used"] = {}
+        return state
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        """Get the number of stored entries."""
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _connect(self):
+        """Get the connection of the current process."""
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout,
+                                         isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def close(self):
+        """Write the pending times of use and close the connection of the
+        current process."""
+        if self._connection is not None and self._pid == os.getpid():
+            self.flush()
+            self._connection.close()
+        self._connection = None
+
+    def flush(self):
+        """Write the times of use of the entries read since the last write."""
+        if not self._used:
+            return
+
+        with self._transaction() as connection:
+            self._write_used(connection)
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Run a block in a write transaction and get its connection.
+
+        The write lock is taken at the start, so what the block reads stays
+        valid until it commits.
+        """
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _write_used(self, connection):
+        """Write the pending times of use in the current transaction."""
+        connection.executemany("UPDATE entries SET used = ? WHERE key = ?",
+                               [(used, key) for key, used in
+                                self._used.items()])
+        self._used.clear()
+
+    def get(self, key):
+        """Get the value stored for a key or None."""
+        connection = self._connect()
+        row = connection.execute("SELECT value FROM entries WHERE key = ?",
+                                 (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._used[key] = time.time()
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        """Store a JSON-serializable value for a key."""
+        self._used.pop(key, None)
+        with self._transaction() as connection:
+            self._write_used(connection)
+            connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time()))
+        self.stores += 1
+        # Counting the entries after every store would cost more than the
+        # store itself, so the size is checked every few stores
+        self._stores_since_check += 1
+        if self._stores_since_check >= max(self.max_entries // 100, 1):
+            self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries above 'max_entries'.
+
+        The entries are counted and removed in one transaction, so processes
+        evicting at the same time do not remove the excess twice.
+
+        Returns:
+            int: the number of removed entries.
+        """
+        self._stores_since_check = 0
+        with self._transaction() as connection:
+            self._write_used(connection)
+            excess = connection.execute(
+                "SELECT COUNT(*) FROM entries").fetchone()[0] \
+                - self.max_entries
+            if excess <= 0:
+                return 0
+
+            connection.execute(
+                "DELETE FROM entries WHERE key IN "
+                "(SELECT key FROM entries ORDER BY used LIMIT ?)", (excess,))
+        self.evictions += excess
+        return excess
+
+    def clear(self):
+        """Remove all entries and reset the statistics."""
+        self._connect().execute("DELETE FROM entries")
+        self._used.clear()
+        self.hits = self.misses = self.stores = self.evictions = 0
+
+    def get_stats(self):
+        """Get hit/miss statistics of this process as a dict."""
+        lookups = self.hits + self.misses
+        return {
+            "size": self.max_entries,
+            "used": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,239 @@
+#! python3
+"""Sequential head-to-head comparison of two strategies.
+
+Games are played in pairs: both games of pair 'i' are dealt with seed
+derive_seed(seed, i) and the strategies swap seats in the second one, so
+the luck of the deal mostly cancels out. Pairs are played in batches and
+after every batch a sequential probability ratio test (SPRT) decides
+between
+    H0: the Elo difference of the first strategy is elo0,
+    H1: the Elo difference of the first strategy is elo1,
+with error rates 'alpha' (accepting H1 when H0 holds) and 'beta'. The
+comparison stops as soon as the log-likelihood ratio leaves its bounds,
+which usually takes far fewer games than a fixed-length tournament.
+
+The log-likelihood ratio uses the normal approximation of the generalized
+SPRT on the average scores of the pairs (1 for a win, 0.5 for a draw).
+
+Usage:
+    python compare.py endgame rarity --elo0 0 --elo1 20
+"""
+import argparse
+import math
+import multiprocessing
+
+from engine import play_game
+from tournament import STRATEGIES
+from tournament import derive_seed
+
+
+def expected_score(elo):
+    """Get the expected score of a player 'elo' points stronger."""
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def to_elo(score):
+    """Get the Elo difference of an expected score."""
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def get_score(result, seat):
+    """Get the score of a seat in a GameResult."""
+    if result.winner is None:
+        return 0.5
+    return 1.0 if result.winner == seat else 0.0
+
+
+class CompareResult:
+    """Aggregated results of game pairs from the first strategy's view.
+
+    pairs - number of game pairs, indexed by the points the first strategy
+        got in both games of the pair (0, 0.5, ..., 2) times two,
+    wins, draws, losses - game results of the first strategy.
+    """
+
+    def __init__(self):
+        self.pairs = [0] * 5
+        self.wins = self.draws = self.losses = 0
+
+    def __str__(self):
+        """Print a summary of the comparison."""
+        if not self.get_size():
+            return "No games played."
+
+        elo, low, high = self.get_elo()
+        return f"Pairs: {self.get_size()}, games: {2 * self.get_size()}\n" \
+               f"Wins: {self.wins}, draws: {self.draws}, " \
+               f"losses: {self.losses}\n" \
+               f"Score: {self.get_mean():.2%}\n" \
+               f"Elo: {elo:+.1f} (95%: {low:+.1f} to {high:+.1f})"
+
+    def add_pair(self, first, second):
+        """Add the scores of the first strategy in both games of a pair."""
+        self.pairs[int(2 * (first + second))] += 1
+        for score in (first, second):
+            if score == 1:
+                self.wins += 1
+            elif score == 0:
+                self.losses += 1
+            else:
+                self.draws += 1
+
+    def merge(self, other):
+        """Merge another CompareResult into this one."""
+        for i, count in enumerate(other.pairs):
+            self.pairs[i] += count
+        self.wins += other.wins
+        self.draws += other.draws
+        self.losses += other.losses
+
+    def get_size(self):
+        """Get the number of game pairs."""
+        return sum(self.pairs)
+
+    def get_mean(self):
+        """Get the average score of the first strategy."""
+        return sum(i / 4 * count for i, count in enumerate(self.pairs)) \
+            / self.get_size()
+
+    def get_variance(self):
+        """Get the variance of the average score of a pair."""
+        mean = self.get_mean()
+        return sum((i / 4 - mean) ** 2 * count
+                   for i, count in enumerate(self.pairs)) / self.get_size()
+
+    def get_elo(self, z=1.96):
+        """Get the Elo difference and its confidence interval.
+
+        Returns:
+            tuple: (elo, low, high) for a z-score of 'z' (1.96 - 95%).
+        """
+        mean = self.get_mean()
+        error = z * math.sqrt(self.get_variance() / self.get_size())
+        return to_elo(mean), to_elo(mean - error), to_elo(mean + error)
+
+    def get_llr(self, elo0, elo1):
+        """Get the log-likelihood ratio of H1 against H0."""
+        size = self.get_size()
+        if not size:
+            return 0.0
+
+        score0, score1 = expected_score(elo0), expected_score(elo1)
+        # A small variance floor keeps a few equal pairs from deciding
+        variance = max(self.get_variance(), 1e-3)
+        return size * (score1 - score0) \
+            * (2 * self.get_mean() - score0 - score1) / (2 * variance)
+
+
+def get_bounds(alpha, beta):
+    """Get the (lower, upper) log-likelihood ratio bounds of an SPRT."""
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def play_pairs(strategies, seed, start, stop):
+    """Play game pairs with indices from 'start' to 'stop'.
+
+    Returns:
+        CompareResult: scores of the first strategy.
+    """
+    first, second = strategies
+    result = CompareResult()
+    for index in range(start, stop):
+        game_seed = derive_seed(seed, index)
+        result.add_pair(
+            get_score(play_game([first, second], game_seed), 0),
+            get_score(play_game([second, first], game_seed), 1))
+    return result
+
+
+def _play_pairs(args):
+    """Unpack pool task arguments for play_pairs."""
+    return play_pairs(*args)
+
+
+def compare(strategies, elo0=0, elo1=10, alpha=0.05, beta=0.05, seed=0,
+            batch_size=500, max_pairs=100000, processes=None,
+            chunk_size=50):
+    """Compare two strategies with a sequential test.
+
+    Arguments:
+        strategies(sequence): picklable Strategy objects to compare;
+        elo0, elo1(float): Elo differences of the first strategy under H0
+            and H1;
+        alpha, beta(float): error rates of the test;
+        seed: seed of the comparison (default 0);
+        batch_size(int): number of game pairs played between the tests;
+        max_pairs(int): number of pairs played at most;
+        processes(int): number of worker processes, all cores by default;
+            1 plays the games in the current process;
+        chunk_size(int): number of pairs sent to a worker at once.
+
+    Returns:
+        tuple: the CompareResult, the final log-likelihood ratio and the
+            accepted hypothesis ('H0', 'H1' or None when 'max_pairs' were
+            played without a decision).
+    """
+    lower, upper = get_bounds(alpha, beta)
+    result = CompareResult()
+    pool = multiprocessing.Pool(processes) if processes != 1 else None
+    try:
+        start = 0
+        while start < max_pairs:
+            stop = min(start + batch_size, max_pairs)
+            tasks = [(strategies, seed, i, min(i + chunk_size, stop))
+                     for i in range(start, stop, chunk_size)]
+            if pool is None:
+                chunks = map(_play_pairs, tasks)
+            else:
+                chunks = pool.imap_unordered(_play_pairs, tasks)
+            for chunk in chunks:
+                result.merge(chunk)
+            start = stop
+
+            llr = result.get_llr(elo0, elo1)
+            if llr >= upper:
+                return result, llr, "H1"
+            if llr <= lower:
+                return result, llr, "H0"
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+    return result, result.get_llr(elo0, elo1), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("strategies", nargs=2, choices=sorted(STRATEGIES),
+                        help="the strategy to test and the reference one")
+    parser.add_argument("--elo0", type=float, default=0)
+    parser.add_argument("--elo1", type=float, default=10)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--max-pairs", type=int, default=100000)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    strategies = [STRATEGIES[name]() for name in args.strategies]
+    result, llr, accepted = compare(
+        strategies, args.elo0, args.elo1, args.alpha, args.beta, args.seed,
+        args.batch_size, args.max_pairs, args.processes)
+    lower, upper = get_bounds(args.alpha, args.beta)
+
+    print(result)
+    print(f"LLR: {llr:.2f} ({lower:.2f}, {upper:.2f})")
+    if accepted == "H1":
+        print(f"H1 accepted: {args.strategies[0]} is stronger by about "
+              f"{args.elo1:g} Elo.")
+    elif accepted == "H0":
+        print(f"H0 accepted: {args.strategies[0]} is not stronger than "
+              f"{args.elo0:g} Elo.")
+    else:
+        print("No decision.")
+
+
+if __name__ == "__main__":
+    main()
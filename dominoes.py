@@ -1,24 +1,62 @@
 #! python3
-"""Domino Game."""
+"""Domino Game.
 
-import re
-import random
+DominoGame.play is a generator of game events, so the game logic does not
+print anything by itself; print_events renders the events in the console.
+"""
 
-import numpy as np
+import random
+from collections import deque, namedtuple
+from itertools import islice
+
+from engine import HAND_SIZE, Strategy
+from engine import legal_moves, make_state
+from tiles import MAX_PIP
+from tiles import deal_tiles, find_starter, get_tile_set, iter_tiles
+from tiles import largest_double, to_mask
+
+
+DealEvent = namedtuple("DealEvent", ["computer", "player", "stock_size"])
+DealEvent.__doc__ = """Dominoes dealt to the computer and the player."""
+StartEvent = namedtuple("StartEvent", ["seat", "domino"])
+StartEvent.__doc__ = """The starting double placed by 'seat'."""
+MoveEvent = namedtuple("MoveEvent", ["seat", "domino", "side"])
+MoveEvent.__doc__ = """A domino placed on the 'L' or 'R' side of the snake."""
+DrawEvent = namedtuple("DrawEvent", ["seat", "domino"])
+DrawEvent.__doc__ = """A domino taken from the stock."""
+PassEvent = namedtuple("PassEvent", ["seat"])
+PassEvent.__doc__ = """A turn skipped with an empty stock."""
+EndEvent = namedtuple("EndEvent", ["result", "winner"])
+EndEvent.__doc__ = """The end of the game.
+
+result - 'win', 'draw' or 'blocked',
+winner - 'computer', 'player' or None for a draw.
+"""
 
 
 class DominoGame:
     """A class that represents a domino game."""
 
-    def __init__(self):
-        """Initialize a game with a full domino set."""
-        domino_set = DominoSet()
+    def __init__(self, strategy=None, profiler=None, max_pip=MAX_PIP,
+                 hand_size=HAND_SIZE):
+        """Initialize a game with a full domino set.
 
-        self.computer_set = domino_set.get_part(7)
-        self.player_set = domino_set.get_part(7)
-        self.stock_set = domino_set
-        self.snake = Snake()
-        self.status = self.get_starting_player()
+        Args:
+            strategy(engine.Strategy): strategy of the computer; the rarity
+                heuristic of get_computer_command is used by default;
+            profiler(profiling.Profiler): profiler measuring the game
+                (default None - no instrumentation);
+            max_pip(int): the highest number of the double-N set (default
+                6 - the standard set);
+            hand_size(int): number of dominoes dealt to each player;
+        """
+        self.strategy = strategy
+        self.profiler = profiler
+        self.max_pip = max_pip
+        self.hand_size = hand_size
+        self.deal()
+        if profiler is not None:
+            profiler.instrument(self)
 
     def __str__(self):
         """Print game status."""
@@ -31,32 +69,52 @@ class DominoGame:
             f"{self.get_status_msg()}"
         return string
 
+    def deal(self):
+        """Deal the dominoes and place the starting double.
+
+        The set is shuffled once per deal and cut into the hands and the
+        stock; the dominoes are dealt again while nobody holds a double.
+        """
+        pieces = get_dominoes(self.max_pip)
+        while True:
+            (computer, player), stock = deal_tiles(
+                random, 2, self.hand_size, len(pieces))
+            self.computer_set = DominoSet([pieces[i] for i in computer],
+                                          self.max_pip)
+            self.player_set = DominoSet([pieces[i] for i in player],
+                                        self.max_pip)
+            self.stock_set = DominoSet([pieces[i] for i in stock],
+                                       self.max_pip)
+            self.snake = Snake(self.max_pip)
+            self.passes = 0
+            self.status = self.get_starting_player()
+            if self.status is not None:
+                return
+
+            if self.profiler is not None:
+                self.profiler.count("redeals")
+
     def get_starting_player(self):
-        """Determine the starting piece and the first player."""
-        max_computer_domino = self.computer_set.get_largest_domino()
-        max_player_domino = self.player_set.get_largest_domino()
-
-        if max_computer_domino is None and max_player_domino is not None:
-            # If only player has a double domino
-            DominoGame.move_domino(max_player_domino, self.player_set,
-                                   self.snake)
-            return "computer"
-        elif max_player_domino is None and max_computer_domino is not None:
-            # If only player has a double domino
-            DominoGame.move_domino(max_computer_domino, self.computer_set, self.snake)
+        """Determine the starting piece and the first player.
+
+        The player holding the largest double places it on the snake.
+
+        Returns:
+            str: status of the other player, who moves first, or None when
+                nobody holds a double.
+        """
+        starter = find_starter([self.computer_set.mask, self.player_set.mask],
+                               self.computer_set.tile_set.doubles_mask)
+        if starter is None:
+            return None
+
+        seat, tile = starter
+        domino = self.computer_set.pieces[tile]
+        if seat == 0:
+            DominoGame.move_domino(domino, self.computer_set, self.snake)
             return "player"
-        elif max_computer_domino.numbers == max_computer_domino.numbers:
-            # Start over if both players have the same comparison result
-            self.__init__()
-        else:
-            if max_player_domino.numbers[0] > max_computer_domino.numbers[0]:
-                DominoGame.move_domino(max_player_domino, self.player_set,
-                                       self.snake)
-                return "computer"
-            elif max_computer_domino.numbers[0] > max_player_domino.numbers[0]:
-                DominoGame.move_domino(max_computer_domino, self.computer_set,
-                                       self.snake)
-                return "player"
+        DominoGame.move_domino(domino, self.player_set, self.snake)
+        return "computer"
 
     def get_status_msg(self):
         """Get message representing next player status."""
@@ -71,10 +129,8 @@ class DominoGame:
     @staticmethod
     def move_domino(domino, source, target, side="R", snake=False):
         """Takes a domino from a source set and places it in a target set."""
-        target.add_domino(domino, side)             # add domino to target
-
-        domino_id = source.dominoes.index(domino)   # get domino index
-        del source.dominoes[domino_id]              # del the piece from source
+        target.add_domino(domino, side)     # add domino to target
+        source.remove_domino(domino)        # del the piece from source
 
     def can_add_to_snake(self, move):
         """Check that the domino piece can be added to the snake."""
@@ -87,64 +143,143 @@ class DominoGame:
 
         domino = self.get_current_player_set().dominoes[abs(move) - 1]
 
-        if snake_side_num in domino.numbers:
-            return True
+        return snake_side_num in domino.numbers
 
-        if self.status == "player":
-            # If such move can't be executed by a player
-            print("Illegal move. Please try again.")
-        return False
+    def get_command_error(self, command):
+        """Get the message explaining why a player command is invalid.
 
-    def is_command_valid(self, command):
-        """Check if the player move command is valid."""
-        if len(command) > 2:
-            print("Invalid input. Please try again.")
-            return False
+        Returns:
+            str: the error message or None if the command is valid.
+        """
+        if len(command) > len(str(-self.player_set.get_size())):
+            return "Invalid input. Please try again."
         try:
             move = int(command)
-            if abs(move) > self.player_set.get_size():
-                # If user takes a non-present domino piece (out of range)
-                print("Invalid input. Please enter an existing index.")
-                return False
-            if move != 0:
-                return self.can_add_to_snake(move)
         except ValueError:
-            print(
-                f"Could not process the move described by command: '{command}'."
-                " Please try again.")
-            return False
+            return f"Could not process the move described by command: " \
+                   f"'{command}'. Please try again."
+
+        if abs(move) > self.player_set.get_size():
+            # If user takes a non-present domino piece (out of range)
+            return "Invalid input. Please enter an existing index."
+        if move != 0 and not self.can_add_to_snake(move):
+            return "Illegal move. Please try again."
+        return None
 
+    def is_command_valid(self, command):
+        """Check if the player move command is valid and print why not."""
+        error = self.get_command_error(command)
+        if error is not None:
+            print(error)
+            return False
         return True
 
-    def get_player_command(self):
-        """Get player move from human (input) or computer (random)."""
-        # print(self.get_status_msg())
+    def get_player_command(self, player=None):
+        """Get a command of the current player.
+
+        Args:
+            player: source of the commands of the player: an engine Strategy,
+                a function getting a command from the game or None (default)
+                to read them from the console;
 
-        # Get human or computer input
+        Raises:
+            ValueError: when a command function returns an invalid command;
+        """
         if self.status == "player":
-            # Get human input until a valid command is entered
-            DO_GET_INPUT = True
-            while DO_GET_INPUT:
-                command = input()
-                if self.is_command_valid(command):
-                    DO_GET_INPUT = False
+            if player is None:
+                # Get human input until a valid command is entered
+                DO_GET_INPUT = True
+                while DO_GET_INPUT:
+                    command = input()
+                    if self.is_command_valid(command):
+                        DO_GET_INPUT = False
+            elif isinstance(player, Strategy):
+                command = self.get_strategy_command(player)
+            else:
+                command = player(self)
+                error = self.get_command_error(command)
+                if error is not None:
+                    raise ValueError(f"{command!r}: {error}")
         else:
-            input()         # get arbitrary input
-            command = "0"   # initialize command with default value
-            self.get_domino_scores()
-            sorted_set = sorted(self.computer_set.dominoes,
-                                key=lambda x: x.score,
-                                reverse=True)
-            for i, domino in enumerate(sorted_set, 1):
-                if self.can_add_to_snake(i):
-                    command = str(i)
-                    break
-                elif self.can_add_to_snake(-i):
-                    command = str(-i)
-                    break
+            if self.strategy is None:
+                command = self.get_computer_command()
+            else:
+                command = self.get_strategy_command(self.strategy)
 
         return command
 
+    def get_strategy_command(self, strategy):
+        """Get a command of the current player chosen by an engine strategy.
+
+        The computer is seat 0 and the player is seat 1 of the engine state.
+        """
+        state = self.get_state()
+        moves = legal_moves(state)
+        if not moves:
+            return "0"
+
+        tile, side = strategy.choose(state, moves)
+        i = self.get_current_player_set().dominoes.index(DOMINOES[tile]) + 1
+        return str(i) if side == "R" else str(-i)
+
+    def get_state(self):
+        """Get the headless engine state of the game.
+
+        Raises:
+            ValueError: when the game is not played with the standard set;
+        """
+        if self.max_pip != MAX_PIP:
+            msg = "Engine states are only available for the standard set."
+            raise ValueError(msg)
+
+        hands = [self.computer_set.mask, self.player_set.mask]
+        stock = [domino.id for domino in self.stock_set.dominoes]
+        turn = 0 if self.status == "computer" else 1
+        return make_state(hands, stock, self.snake.mask, self.snake.left,
+                          self.snake.right, turn)
+
+    def get_computer_command(self):
+        """Get a command placing the highest scored domino that fits the snake.
+
+        Legal placements are scanned once keeping the best one, so the hand
+        does not have to be sorted. From equally scored placements the first
+        one from get_legal_moves is chosen.
+        """
+        scores = self.get_domino_scores()
+
+        best_move = None
+        best_score = -1
+        for domino, side in self.get_legal_moves():
+            if scores[domino] > best_score:
+                best_move, best_score = (domino, side), scores[domino]
+
+        if best_move is None:
+            return "0"  # draw a domino if none can be placed
+
+        domino, side = best_move
+        i = self.computer_set.dominoes.index(domino) + 1
+        return str(i) if side == "R" else str(-i)
+
+    def get_legal_moves(self):
+        """Get placements of the current player dominoes that fit the snake.
+
+        Matching dominoes are found with the number index of the player set,
+        so the time is proportional to the number of legal placements.
+
+        Returns:
+            list: (domino, side) pairs, right side placements first; only the
+                right side is listed when both snake ends show the same number.
+        """
+        current_set = self.get_current_player_set()
+        right, left = self.snake.right, self.snake.left
+
+        moves = [(domino, "R")
+                 for domino in current_set.get_matching_dominoes(right)]
+        if left != right:
+            moves += [(domino, "L")
+                      for domino in current_set.get_matching_dominoes(left)]
+        return moves
+
     def get_current_player_set(self):
         """Return a domino set of a current player."""
         if self.status == "player":
@@ -153,19 +288,22 @@ class DominoGame:
             return self.computer_set
 
     def get_domino_scores(self):
-        """Calculate domino scores based on their rarity."""
+        """Calculate domino scores based on their rarity.
+
+        Returns:
+            dict: scores of dominoes in the current player set.
+        """
         # Count the number of 0's, 1's, etc. in hand and snake
         current_player_set = self.get_current_player_set()
-        hand_numbers = current_player_set.get_domino_values()
-        snake_numbers = self.snake.get_domino_values()
-        total_numbers = np.array([hand_numbers + snake_numbers])
-
-        counts = {}
-        for i in range(7):
-            counts[i] = np.sum(total_numbers == i)
+        counts = [hand + snake for hand, snake in
+                  zip(current_player_set.pip_counts, self.snake.pip_counts)]
 
+        scores = {}
         for domino in current_player_set.dominoes:
-            domino.score = counts[domino.numbers[0]] + counts[domino.numbers[1]]
+            a, b = domino.numbers
+            scores[domino] = counts[a] + counts[b]
+
+        return scores
 
     def do_play_game(self):
         """Determine whether the end-game conditions are met."""
@@ -173,46 +311,66 @@ class DominoGame:
         if not self.player_set.dominoes or not self.computer_set.dominoes:
             return False, "win"
 
-        # 2. The numbers on the ends of the snake are equal and appear 8 times
-        first_domino = self.snake.get_domino_values()[0]
-        last_domino = self.snake.get_domino_values()[-1]
-
-        # Check that last domino consists of any number from the first one
-        end_num = False
-        for num in first_domino:
-            if num in last_domino:
-                end_num = num
-                break
-
-        if end_num:
-            counter = 2
-            for piece in self.snake.get_domino_values()[1:-1]:
-                if end_num in piece:
-                    counter += 1
-            if counter == 8:
-                return False, "draw"
+        # 2. The numbers on the ends of the snake are equal and appear
+        # max_pip + 2 times, 8 in the standard set (all dominoes with that
+        # number are in the snake)
+        end_num = self.snake.left
+        if end_num == self.snake.right \
+                and self.snake.pip_counts[end_num] == self.max_pip + 2:
+            return False, "draw"
+
+        # 3. Both players skipped their turns - blocked
+        if self.passes == 2:
+            return False, "blocked"
 
         return True, None
 
-    def make_move(self):
+    def get_winner(self, result):
+        """Get the winner of a finished game ('computer', 'player' or None).
+
+        A blocked game is won by the player with the lower pip total.
+        """
+        if result == "win":
+            return "computer" if not self.computer_set.dominoes else "player"
+        if result == "blocked":
+            computer = self.computer_set.get_pip_total()
+            player = self.player_set.get_pip_total()
+            if computer != player:
+                return "computer" if computer < player else "player"
+        return None
+
+    def make_move(self, command=None):
         """Make a move in the game based on a sign and integer number input.
 
         Take an action in the game by placing a domino on the left or right side
         of the snake or taking an extra piece from the stock and skip a turn.
+
+        Args:
+            command(str): a valid command of the current player; it is read
+                with get_player_command by default;
+
+        Returns:
+            MoveEvent, DrawEvent or PassEvent: the event of the move.
         """
-        move = self.get_player_command()
+        move = self.get_player_command() if command is None else command
         current_set = self.get_current_player_set()
+        seat = self.status
 
-        if "0" in move:
+        if int(move) == 0:
             # Get a domino piece from stock or skip turn if stock is empty
             try:
-                current_set.dominoes.append(self.stock_set.dominoes.pop())
+                domino = self.stock_set.pop_domino()
             except IndexError:
-                pass
+                self.passes += 1
+                event = PassEvent(seat)
+            else:
+                current_set.add_domino(domino)
+                self.passes = 0
+                event = DrawEvent(seat, domino)
         else:
             if move[0] == "-":
                 side = "L"
-                move = move[1]  # set domino number to the first position
+                move = move[1:]     # strip the sign
             else:
                 side = "R"
 
@@ -223,70 +381,128 @@ class DominoGame:
             # Move the domino piece from current player set to the snake set
             DominoGame.move_domino(domino_to_move, current_set, self.snake,
                                    side, snake=True)
+            self.passes = 0
+            event = MoveEvent(seat, domino_to_move, side)
 
         # Set next player status
         self.status = "player" if self.status == "computer" else "computer"
+        return event
+
+    def play(self, player=None):
+        """Play the game.
+
+        The game advances only when the next event is requested, so the
+        events can be rendered (see print_events) before the player is asked
+        for a command. With a 'player' strategy or command function (see
+        get_player_command) the game runs without any console input.
+
+        Yields:
+            DealEvent, StartEvent, then a MoveEvent, DrawEvent or PassEvent
+            for every turn and finally an EndEvent.
+        """
+        start_domino = self.snake.dominoes[0]
+        starter = "player" if self.status == "computer" else "computer"
+        computer_hand = tuple(self.computer_set.dominoes)
+        player_hand = tuple(self.player_set.dominoes)
+        if starter == "computer":
+            computer_hand += (start_domino,)
+        else:
+            player_hand += (start_domino,)
+
+        yield DealEvent(computer_hand, player_hand,
+                        self.stock_set.get_size())
+        yield StartEvent(starter, start_domino)
 
-    def play(self):
-        """Play the game."""
         DO_PLAY_FLAG = True
         while DO_PLAY_FLAG:
-            print(self)
-
-            self.make_move()
+            yield self.make_move(self.get_player_command(player))
 
             DO_PLAY_FLAG, result = self.do_play_game()
 
-        if result == "draw":
-            print("Status: The game is over. It's a draw!")
-        else:
-            if self.status == "computer":
+        yield EndEvent(result, self.get_winner(result))
+
+
+def print_events(game, events, pause=False):
+    """Render events of a game in the console.
+
+    The board is printed before every move and the result at the end. With
+    'pause' Enter has to be pressed before every move of the computer.
+    """
+    for event in events:
+        if isinstance(event, EndEvent):
+            if event.winner is None:
+                print("Status: The game is over. It's a draw!")
+            elif event.winner == "player":
                 print("Status: The game is over. You won!")
             else:
                 print("Status: The game is over. The computer won!")
+        elif not isinstance(event, DealEvent) and game.do_play_game()[0]:
+            print(game)
+            if pause and game.status == "computer":
+                input()     # get arbitrary input
 
 
 class DominoSet:
     """A class that represents a domino set."""
 
-    def __init__(self, domino_list=None):
+    def __init__(self, domino_list=None, max_pip=MAX_PIP):
         """Initialize a domino set.
 
         Initializes a DominoSet instance with 'dominoes' attribute that stores
         a list of Domino objects. Pairs of integers stored in a form of a list
         or a tuple are also valid.
+        The 'mask' attribute is a bitmask of domino ids in the set (see the
+        'tiles' module) that answers membership queries without scanning the
+        list; the list only keeps the order in which the dominoes are shown.
+        The 'pip_counts' attribute keeps how many times each number appears
+        in the set and is updated whenever a domino is added or removed.
         A full set will be created by default. This behavior may be changed by
         passing 'domino_list' argument.
+        The 'tile_set' attribute describes the double-N set the dominoes come
+        from (see tiles.get_tile_set) and 'pieces' holds all its dominoes by
+        id.
 
         Args:
             domino_list: a list with Domino objects to create a DominoSet
                 (default None);
+            max_pip(int): the highest number of the double-N set (default 6);
 
         Raises:
             Exception: when any element in the 'domino_list' is not valid;
         """
+        self.tile_set = get_tile_set(max_pip)
+        self.pieces = get_dominoes(max_pip)
         self.dominoes = []
 
         if domino_list is None:
             # Initialize with a full domino set
-            for i in range(6 + 1):
-                self.dominoes += [Domino([i, j]) for j in range(i, 6 + 1)]
+            self.dominoes = list(self.pieces)
         else:
             if domino_list:
                 # Initialize with an arbitrary set
                 for element in domino_list:
-                    if isinstance(element, Domino):
+                    if isinstance(element, Domino) \
+                            and element.max_pip == max_pip:
                         self.dominoes.append(element)
                     elif isinstance(element, (tuple, list)):
-                        self.dominoes.append(Domino(element))
+                        self.dominoes.append(Domino(element, max_pip))
                     else:
                         msg = "Wrong argument was passed to the function."
                         raise Exception(msg)
 
+        self.mask = to_mask(domino.id for domino in self.dominoes)
+        self.pip_counts = [0] * (max_pip + 1)
+        for domino in self.dominoes:
+            self.count_numbers(domino, 1)
+
     def __str__(self):
         """Print a domino set as a list of dominoes."""
         return str(self.get_domino_values())
 
+    def __contains__(self, domino):
+        """Check that the domino piece is in the domino set."""
+        return bool(self.mask >> domino.id & 1)
+
     def add_domino(self, domino, side="R"):
         """Add a domino piece to a DominoSet instance.
 
@@ -310,6 +526,37 @@ class DominoSet:
             self.dominoes.append(domino)
         elif side == "L":
             self.dominoes.insert(0, domino)
+        self.mask |= 1 << domino.id
+        self.count_numbers(domino, 1)
+
+    def remove_domino(self, domino):
+        """Remove a domino piece from a DominoSet instance.
+
+        Raises:
+            ValueError: when 'domino' is not in the domino set;
+        """
+        if domino not in self:
+            raise ValueError(f"Domino {domino} is not in the domino set.")
+
+        self.dominoes.remove(domino)
+        self.mask &= ~(1 << domino.id)
+        self.count_numbers(domino, -1)
+
+    def pop_domino(self):
+        """Remove and return the last domino piece of a DominoSet instance.
+
+        Raises:
+            IndexError: when the domino set is empty;
+        """
+        domino = self.dominoes.pop()
+        self.mask &= ~(1 << domino.id)
+        self.count_numbers(domino, -1)
+        return domino
+
+    def count_numbers(self, domino, change):
+        """Change the counts of numbers of a domino added or removed."""
+        for number in domino.numbers:
+            self.pip_counts[number] += change
 
     def get_part(self, quantity, remove_original=True):
         """Get a part of random domino pieces from the domino set."""
@@ -319,27 +566,45 @@ class DominoSet:
         part = random.sample(self.dominoes, quantity)
 
         if remove_original:
+            # Filter the list once instead of removing the pieces one by one
+            removed = to_mask(piece.id for piece in part)
+            self.dominoes = [domino for domino in self.dominoes
+                             if not removed >> domino.id & 1]
+            self.mask &= ~removed
             for piece in part:
-                self.dominoes.remove(piece)
+                self.count_numbers(piece, -1)
+
+        return DominoSet(domino_list=part, max_pip=self.tile_set.max_pip)
 
-        return DominoSet(domino_list=part)
+    def has_double(self):
+        """Check that the domino set holds any double domino."""
+        return bool(self.mask & self.tile_set.doubles_mask)
+
+    def has_number(self, number):
+        """Check that any domino in the domino set holds the number."""
+        return bool(self.mask & self.tile_set.pip_masks[number])
 
     def get_double_dominoes(self):
         """Get a list of double dominoes in the domino set."""
-        return [domino for domino in self.dominoes if domino.is_double()]
+        doubles = self.mask & self.tile_set.doubles_mask
+        return [self.pieces[tile] for tile in iter_tiles(doubles)]
+
+    def get_matching_dominoes(self, number):
+        """Get a list of dominoes in the domino set that hold the number.
+
+        'mask & pip_masks[number]' indexes the dominoes by number, so only
+        the matching dominoes are visited whatever the size of the set.
+        """
+        matching = self.mask & self.tile_set.pip_masks[number]
+        return [self.pieces[tile] for tile in iter_tiles(matching)]
 
     def get_largest_domino(self):
         """Find the largest double domino in the domino set."""
-        doubles = self.get_double_dominoes()
-        if not doubles:
+        max_id = largest_double(self.mask, self.tile_set.doubles_mask)
+        if max_id is None:
             return None
-        else:
-            max_domino = doubles[0]
-            for domino in doubles:
-                if domino.numbers[0] > max_domino.numbers[0]:
-                    max_domino = domino
 
-            return max_domino
+        return self.pieces[max_id]
 
     def get_domino_values(self):
         """Get numbers of domino pieces as a list."""
@@ -356,6 +621,11 @@ class DominoSet:
         """Get the number of dominoes remaining in the stock."""
         return len(self.dominoes)
 
+    def get_pip_total(self):
+        """Get the sum of numbers on all dominoes of the set."""
+        return sum(number * count
+                   for number, count in enumerate(self.pip_counts))
+
     def get_side_number(self, side):
         """Get the first or the last number from the domino set."""
         if side == "R":
@@ -367,53 +637,109 @@ class DominoSet:
 
 
 class Snake(DominoSet):
-    """A DominoSet subclass that represents a snake."""
+    """A DominoSet subclass that represents a snake.
 
-    def __init__(self):
-        super().__init__(domino_list=[])
+    Domino pieces are immutable, so the orientation of every piece in the
+    snake is kept in 'placements' - (left, right) number pairs ordered the
+    same way as 'dominoes'. Both are deques, so a domino is placed on either
+    side in constant time, and the numbers on the ends of the snake are kept
+    in 'left' and 'right' attributes (None for an empty snake).
+    """
+
+    def __init__(self, max_pip=MAX_PIP):
+        super().__init__(domino_list=[], max_pip=max_pip)
+        self.dominoes = deque()
+        self.placements = deque()
+        self.left = self.right = None
 
     def __str__(self):
         """Replaces get_snake_str"""
         string = ""
-        if len(self.dominoes) > 6:
-            for domino in self.dominoes[:3]:
-                string += str(domino.numbers)
+        if len(self.placements) > 6:
+            for numbers in islice(self.placements, 3):
+                string += str(list(numbers))
             string += "..."
-            for domino in self.dominoes[-3:]:
-                string += str(domino.numbers)
+            for numbers in islice(self.placements, len(self.placements) - 3,
+                                  None):
+                string += str(list(numbers))
         else:
-            for domino in self.dominoes:
-                string += str(domino.numbers)
+            for numbers in self.placements:
+                string += str(list(numbers))
 
         return string
 
     def add_domino(self, domino, side):
         """Add a domino piece to a Snake instance.
 
-        The function checks if the domino piece needs to be switched and appends
-        it to a list that stores snake pieces.
+        The function orients the domino piece so that it matches the side of
+        the snake and records its placement.
         """
-        if self.dominoes:
-            side_number = self.get_side_number(side)
-            if side == "R" and domino.numbers[0] != side_number:
-                domino.switch_numbers()
-            if side == "L" and domino.numbers[1] != side_number:
-                domino.switch_numbers()
+        a, b = domino.numbers
+        if side == "R" and self.right is not None and a != self.right:
+            a, b = b, a
+        if side == "L" and self.left is not None and b != self.left:
+            a, b = b, a
 
         super().add_domino(domino, side)
 
+        if side == "R":
+            self.placements.append((a, b))
+            self.right = b
+            if self.left is None:
+                self.left = a
+        else:
+            self.placements.appendleft((a, b))
+            self.left = a
+            if self.right is None:
+                self.right = b
+
+    def get_domino_values(self):
+        """Get oriented numbers of domino pieces as a list."""
+        return [list(numbers) for numbers in self.placements]
+
+    def get_side_number(self, side):
+        """Get the number on the left or the right end of the snake."""
+        return self.right if side == "R" else self.left
+
 
 class Domino:
-    """A class that represents a single domino piece."""
+    """A class that represents a single domino piece.
 
-    def __init__(self, numbers):
-        """Initialize a domino piece using a list of integers."""
-        if self.is_valid(numbers):
-            self.numbers = numbers
-        else:
-            msg = f'Error when initializing a domino piece. Could not ' \
-                  f'initialize a domino piece with argument {numbers}. '
-            raise ValueError(msg)
+    Domino pieces are immutable and interned: the pieces of a double-N set
+    are created once (see get_dominoes; DOMINOES holds the standard set) and
+    Domino([a, b]) returns the same object as Domino([b, a]). The numbers are
+    always kept in increasing order. 'id' is the id of the piece in its set
+    and 'max_pip' the highest number of the set.
+    """
+
+    __slots__ = ("id", "max_pip", "_numbers")
+
+    def __new__(cls, numbers, max_pip=MAX_PIP):
+        """Get a domino piece of the double-'max_pip' set using a list of
+        integers.
+        """
+        if cls.is_valid(numbers, max_pip):
+            tile = get_tile_set(max_pip).ids[tuple(numbers)]
+            return get_dominoes(max_pip)[tile]
+
+        msg = f'Error when initializing a domino piece. Could not ' \
+              f'initialize a domino piece with argument {numbers}. '
+        raise ValueError(msg)
+
+    @classmethod
+    def _create(cls, tile, tile_set):
+        """Create the domino piece with the given id in a TileSet."""
+        domino = object.__new__(cls)
+        object.__setattr__(domino, "id", tile)
+        object.__setattr__(domino, "max_pip", tile_set.max_pip)
+        object.__setattr__(domino, "_numbers", tile_set.tiles[tile])
+        return domino
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Domino pieces are immutable.")
+
+    def __reduce__(self):
+        return Domino, (self.numbers, self.max_pip)
 
     def __repr__(self):
         return f'Domino({self.numbers})'
@@ -422,26 +748,31 @@ class Domino:
         """Print domino numbers as a collection of lists."""
         return f'{self.numbers}'
 
+    @property
+    def numbers(self):
+        """Get domino numbers as a list."""
+        return list(self._numbers)
+
     def switch_numbers(self):
-        """Switch domino orientation."""
-        numbers = self.numbers[::-1]
-        self.numbers = numbers
+        """Get domino numbers in the switched orientation."""
+        return self.numbers[::-1]
 
     def is_double(self):
         """Check that the domino is 'double' - both numbers are equal."""
-        return True if self.numbers[0] == self.numbers[1] else False
+        return self._numbers[0] == self._numbers[1]
 
     @staticmethod
-    def is_valid(numbers):
+    def is_valid(numbers, max_pip=MAX_PIP):
         """Check that the domino piece is valid.
 
         A domino piece is valid when the following conditions are fulfilled:
         - the 'numbers' list consists of two elements only,
         - these elements are of integer type,
-        - both elements values are between or equal 0 and 6 range.
+        - both elements values are between or equal 0 and 'max_pip' range.
 
         Arguments:
-            numbers(list): a list of numbers that define a domino piece.
+            numbers(list): a list of numbers that define a domino piece;
+            max_pip(int): the highest number of the set (default 6).
 
         Returns:
             bool: True if 'numbers' list satisfies the defined conditions.
@@ -455,17 +786,34 @@ class Domino:
                 return False
 
             # Check that the list elements are in valid range
-            is_in_range = all(map(lambda x: 0 <= x <= 6, numbers))
+            is_in_range = all(map(lambda x: 0 <= x <= max_pip, numbers))
             if not is_in_range:
                 return False
 
         return True
 
 
+_domino_sets = {}
+
+
+def get_dominoes(max_pip):
+    """Get the interned pieces of the double-'max_pip' set ordered by id."""
+    pieces = _domino_sets.get(max_pip)
+    if pieces is None:
+        tile_set = get_tile_set(max_pip)
+        pieces = tuple(Domino._create(tile, tile_set)
+                       for tile in range(tile_set.count))
+        _domino_sets[max_pip] = pieces
+    return pieces
+
+
+DOMINOES = get_dominoes(MAX_PIP)
+
+
 if __name__ == "__main__":
     # Initialize a seed
     random.seed(42)
 
     # Initialize a Domino Game
     game = DominoGame()
-    game.play()
+    print_events(game, game.play(), pause=True)
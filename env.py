@@ -0,0 +1,208 @@
+#! python3
+"""Vectorized reinforcement learning environment of domino games.
+
+VectorEnv steps K engine games at once with integer actions and returns
+fixed-shape NumPy arrays, so no command strings are built or parsed. The
+agent plays one seat and an engine Strategy plays the other one; the turns
+of the opponent are played inside step.
+
+Actions (ACTION_COUNT):
+- tile * 2 + side for placing domino 'tile' on the right (side 0) or the
+  left (side 1) end of the snake,
+- DRAW_ACTION for drawing a domino, or passing when the stock is empty; it
+  is the only legal action when no domino fits.
+
+Observations (OBSERVATION_SIZE values for every game):
+- the dominoes in the agent's hand (TILE_COUNT values of 0 or 1),
+- the dominoes in the snake (TILE_COUNT values of 0 or 1),
+- the numbers on the left and the right end of the snake (two one-hot
+  vectors of MAX_PIP + 1 values),
+- the number of dominoes of the opponent and in the stock.
+"""
+import random
+
+import numpy as np
+
+from engine import DRAW, PASS
+from engine import RarityStrategy
+from engine import deal
+from tiles import MAX_PIP, TILES, TILE_COUNT
+from tiles import count
+
+SIDES = ("R", "L")
+DRAW_ACTION = 2 * TILE_COUNT
+ACTION_COUNT = DRAW_ACTION + 1
+
+_PIPS = MAX_PIP + 1
+_HAND, _SNAKE = 0, TILE_COUNT
+_LEFT = 2 * TILE_COUNT
+_RIGHT = _LEFT + _PIPS
+_SIZES = _RIGHT + _PIPS
+OBSERVATION_SIZE = _SIZES + 2
+
+_TILE_BITS = np.arange(TILE_COUNT, dtype=np.int64)
+# _HOLDS[p, t] - domino t holds number p
+_HOLDS = np.array([[pip in tile for tile in TILES] for pip in range(_PIPS)])
+
+
+def to_move(action, state):
+    """Get the engine move of an action in a state."""
+    if action == DRAW_ACTION:
+        return DRAW if state.stock else PASS
+    return action >> 1, SIDES[action & 1]
+
+
+def to_action(move):
+    """Get the action of an engine move."""
+    if move == DRAW or move == PASS:
+        return DRAW_ACTION
+    tile, side = move
+    return 2 * tile + SIDES.index(side)
+
+
+class VectorEnv:
+    """K domino games played by an agent against a fixed opponent.
+
+    A finished game is replaced with a new one within the same step (auto
+    reset), so every step returns observations of games waiting for the
+    agent's action.
+    """
+
+    def __init__(self, num_envs, seed=None, opponent=None, seat=1):
+        """Initialize the environments.
+
+        Arguments:
+            num_envs(int): number of games played at once;
+            seed: seed of the deals (default None - random);
+            opponent(Strategy): strategy of the other seat, RarityStrategy
+                by default;
+            seat(int): engine seat of the agent (0 is dealt first).
+        """
+        self.num_envs = num_envs
+        self.opponent = opponent if opponent is not None \
+            else RarityStrategy()
+        self.seat = seat
+        self.rng = random.Random(seed)
+        self.states = [None] * num_envs
+        self.episodes = 0
+
+    def reset(self):
+        """Deal new games in all environments.
+
+        Returns:
+            tuple: observations (num_envs, OBSERVATION_SIZE) and legal
+                action masks (num_envs, ACTION_COUNT).
+        """
+        for i in range(self.num_envs):
+            self.states[i] = self._new_game()
+        return self.observe()
+
+    def step(self, actions):
+        """Play an action in every game.
+
+        Arguments:
+            actions(sequence): an action for every environment.
+
+        Returns:
+            tuple: observations, rewards (1 for a won, -1 for a lost and 0
+                for a drawn or unfinished game), dones (True for games that
+                ended and were replaced with new ones) and legal action
+                masks.
+
+        Raises:
+            ValueError: when an action is not legal; no game is changed then;
+        """
+        if len(actions) != self.num_envs:
+            raise ValueError(f"Expected {self.num_envs} actions, got "
+                             f"{len(actions)}.")
+
+        # All actions are checked before any game is changed
+        moves = []
+        for i, (action, state) in enumerate(zip(actions, self.states)):
+            move = to_move(int(action), state)
+            if move not in state.get_moves():
+                raise ValueError(f"Illegal action {action} in environment "
+                                 f"{i}.")
+            moves.append(move)
+
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        dones = np.zeros(self.num_envs, dtype=bool)
+        for i, move in enumerate(moves):
+            state = self.states[i]
+            state.apply(move)
+            outcome = self._play_opponent(state)
+            if outcome is not None:
+                winner = outcome[1]
+                if winner is not None:
+                    rewards[i] = 1 if winner == self.seat else -1
+                dones[i] = True
+                self.episodes += 1
+                self.states[i] = self._new_game()
+
+        observations, masks = self.observe()
+        return observations, rewards, dones, masks
+
+    def observe(self):
+        """Get observations and legal action masks of the games."""
+        arrays = self._gather()
+        return self._get_observations(*arrays), self._get_masks(*arrays)
+
+    def _get_observations(self, hands, played, left, right, sizes):
+        """Get observations of the games as a float32 array."""
+        observations = np.zeros((self.num_envs, OBSERVATION_SIZE),
+                                dtype=np.float32)
+        observations[:, _HAND:_SNAKE] = hands[:, None] >> _TILE_BITS & 1
+        observations[:, _SNAKE:_LEFT] = played[:, None] >> _TILE_BITS & 1
+        rows = np.arange(self.num_envs)
+        observations[rows, _LEFT + left] = 1
+        observations[rows, _RIGHT + right] = 1
+        observations[:, _SIZES:] = sizes
+        return observations
+
+    def _get_masks(self, hands, played, left, right, sizes):
+        """Get legal actions of the games as a boolean array."""
+        in_hand = (hands[:, None] >> _TILE_BITS & 1).astype(bool)
+        masks = np.zeros((self.num_envs, ACTION_COUNT), dtype=bool)
+        masks[:, 0:DRAW_ACTION:2] = in_hand & _HOLDS[right]
+        masks[:, 1:DRAW_ACTION:2] = in_hand & _HOLDS[left] \
+            & (left != right)[:, None]
+        masks[:, DRAW_ACTION] = ~masks[:, :DRAW_ACTION].any(axis=1)
+        return masks
+
+    def _gather(self):
+        """Collect the visible parts of the games into arrays."""
+        seat, other = self.seat, 1 - self.seat
+        states = self.states
+        hands = np.array([state.hands[seat] for state in states],
+                         dtype=np.int64)
+        played = np.array([state.played for state in states],
+                          dtype=np.int64)
+        left = np.array([state.left for state in states])
+        right = np.array([state.right for state in states])
+        sizes = np.array([(count(state.hands[other]), len(state.stock))
+                          for state in states])
+        return hands, played, left, right, sizes
+
+    def _new_game(self):
+        """Deal a game and play until the agent is to move."""
+        while True:
+            state = deal(random.Random(self.rng.getrandbits(64)))
+            if self._play_opponent(state) is None:
+                return state
+
+    def _play_opponent(self, state):
+        """Play the turns of the opponent.
+
+        Returns:
+            tuple: the outcome of the game or None when the agent is to move.
+        """
+        outcome = state.get_outcome()
+        while outcome is None and state.turn != self.seat:
+            moves = state.get_moves()
+            if len(moves) == 1:
+                move = moves[0]
+            else:
+                move = self.opponent.choose(state, moves)
+            state.apply(move)
+            outcome = state.get_outcome()
+        return outcome
@@ -0,0 +1,277 @@
+#! python3
+"""Determinized Monte Carlo evaluation of moves.
+
+A seat sees its own hand, the snake, the size of the other hand and the size
+of the stock. The evaluator repeatedly deals the dominoes it can not see at
+random between the other hand and the stock ("determinization"), plays every
+candidate move on the same deal and finishes the game with a fast rollout
+policy. The average score of a move (1 for a win, 0.5 for a draw and 0 for
+a loss) estimates its win rate.
+
+Rollouts run in tasks of a few deals spread over a worker pool. Results of
+the tasks are added in the order of the tasks and after every task the
+evaluation stops when the best move is statistically clear - its win rate
+is above the second best one by more than the confidence interval of the
+difference - or when the rollout budget is used up, so the result does not
+depend on the number of workers. The time budget stops starting new tasks;
+at least one task is always played. Tasks still running when the
+evaluation stops early are waited for, so the pool is idle when the next
+evaluation starts. Evaluations can be kept in an EvaluationCache and reused
+by later runs and other processes.
+"""
+import math
+import multiprocessing
+import random
+import time
+from collections import deque, namedtuple
+
+from cache import get_view_key
+from engine import RarityStrategy, Strategy
+from engine import make_state, play_out
+from tiles import FULL_MASK
+from tiles import count, iter_tiles
+from tournament import derive_seed
+
+View = namedtuple("View", ["hand", "played", "left", "right",
+                           "opponent_size", "stock_size"])
+View.__doc__ = """Information visible to the seat to move.
+
+hand - mask of dominoes of the seat,
+played - mask of dominoes in the snake,
+left, right - numbers on the ends of the snake,
+opponent_size - number of dominoes of the other seat,
+stock_size - number of dominoes in the stock.
+"""
+
+
+def get_view(state):
+    """Get the information visible to the seat to move of a GameState."""
+    return View(state.hands[state.turn], state.played, state.left,
+                state.right, count(state.hands[1 - state.turn]),
+                len(state.stock))
+
+
+def sample_state(view, rng):
+    """Deal the hidden dominoes at random consistently with the view.
+
+    Returns:
+        GameState: a state with seat 0 to move holding 'view.hand'.
+    """
+    hidden = list(iter_tiles(FULL_MASK & ~(view.hand | view.played)))
+    rng.shuffle(hidden)
+
+    opponent = 0
+    for tile in hidden[:view.opponent_size]:
+        opponent |= 1 << tile
+    return make_state([view.hand, opponent], hidden[view.opponent_size:],
+                      view.played, view.left, view.right, 0, rng)
+
+
+def run_rollouts(view, moves, deals, seed, policy=None):
+    """Play every move on 'deals' random deals and finish the games.
+
+    Returns:
+        list: sums of scores of the moves for the seat of the view.
+    """
+    rng = random.Random(seed)
+    policy = policy if policy is not None else RarityStrategy()
+    strategies = [policy, policy]
+    scores = [0.0] * len(moves)
+    for _ in range(deals):
+        state = sample_state(view, rng)
+        for i, move in enumerate(moves):
+            rollout = state.clone()
+            rollout.apply(move)
+            (_, winner), _ = play_out(rollout, strategies)
+            if winner is None:
+                scores[i] += 0.5
+            elif winner == 0:
+                scores[i] += 1.0
+    return scores
+
+
+Evaluation = namedtuple("Evaluation", ["moves", "win_rates", "deals",
+                                       "stopped_early"])
+Evaluation.__doc__ = """Result of a move evaluation.
+
+moves - evaluated moves,
+win_rates - estimated win rate of each move,
+deals - number of random deals every move was played on,
+stopped_early - True when the best move was clear before the budget ended.
+"""
+
+
+class MonteCarloEvaluator:
+    """Estimate win rates of moves with determinized rollouts."""
+
+    def __init__(self, processes=None, time_limit=0.5, max_deals=2000,
+                 deals_per_task=25, confidence=2.58, policy=None, seed=None,
+                 cache=None):
+        """Initialize an evaluator.
+
+        Arguments:
+            processes(int): number of worker processes, all cores by default;
+                1 runs the rollouts in the current process;
+            time_limit(float): evaluation time budget in seconds;
+            max_deals(int): maximum number of deals per evaluation (at least
+                1);
+            deals_per_task(int): number of deals sent to a worker at once;
+            confidence(float): z-score of the confidence bounds used to stop
+                early (2.58 - 99%);
+            policy(Strategy): picklable rollout policy of both seats,
+                RarityStrategy by default;
+            seed: seed of the evaluations (default None - random);
+            cache(EvaluationCache): persistent cache of the evaluations
+                (default None - no caching).
+
+        Raises:
+            ValueError: when 'max_deals' or 'deals_per_task' is below 1;
+        """
+        if max_deals < 1 or deals_per_task < 1:
+            raise ValueError("At least one deal has to be played.")
+
+        self.processes = processes
+        self.time_limit = time_limit
+        self.max_deals = max_deals
+        self.deals_per_task = deals_per_task
+        self.confidence = confidence
+        self.policy = policy
+        self.rng = random.Random(seed)
+        self.cache = cache
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getstate__(self):
+        """Drop the worker pool when the evaluator is pickled."""
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        return state
+
+    def close(self):
+        """Stop the worker processes."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+    def get_namespace(self):
+        """Get the cache namespace of evaluations with these settings.
+
+        The rollout policy, the rollout budget and the stopping rule change
+        the evaluations, so evaluators with other settings do not share the
+        cached ones. The time budget is left out: the evaluations made with
+        it depend on the speed of the machine anyway.
+        """
+        policy = self.policy if self.policy is not None else RarityStrategy()
+        return (f"montecarlo:{type(policy).__name__}:{self.max_deals}:"
+                f"{self.deals_per_task}:{self.confidence}")
+
+    def evaluate(self, view, moves):
+        """Estimate win rates of moves of the seat with the given view.
+
+        Arguments:
+            view(View): information visible to the seat to move;
+            moves(list): candidate moves.
+
+        Returns:
+            Evaluation: win rates in the order of 'moves'.
+        """
+        if self.cache is not None:
+            key, codes = get_view_key(self.get_namespace(), view, moves)
+            entry = self.cache.get(key)
+            if entry is not None:
+                rates = dict(zip(entry["codes"], entry["win_rates"]))
+                return Evaluation(moves, [rates[code] for code in codes],
+                                  entry["deals"], entry["stopped_early"])
+
+        seed = self.rng.getrandbits(64)
+        workers = self.processes or multiprocessing.cpu_count()
+        if workers > 1 and self._pool is None:
+            self._pool = multiprocessing.Pool(workers)
+        deadline = time.perf_counter() + self.time_limit
+
+        scores = [0.0] * len(moves)
+        deals = started = task = 0
+        stopped_early = False
+        pending = deque()
+        while True:
+            # Keep every worker busy with the next tasks
+            while len(pending) < workers and started < self.max_deals \
+                    and (not task or time.perf_counter() < deadline):
+                size = min(self.deals_per_task, self.max_deals - started)
+                args = (view, moves, size, derive_seed(seed, task),
+                        self.policy)
+                if self._pool is None:
+                    pending.append((size, run_rollouts(*args)))
+                else:
+                    pending.append(
+                        (size, self._pool.apply_async(run_rollouts, args)))
+                started += size
+                task += 1
+            if not pending:
+                break
+
+            size, result = pending.popleft()
+            if self._pool is not None:
+                result = result.get()
+            for i, score in enumerate(result):
+                scores[i] += score
+            deals += size
+
+            if self.is_best_clear(scores, deals):
+                stopped_early = True
+                break
+
+        # Tasks started before an early stop would delay the tasks of the
+        # next evaluation in the pool, so they are finished here
+        if self._pool is not None:
+            for _, result in pending:
+                result.wait()
+
+        win_rates = [score / deals for score in scores]
+        if self.cache is not None:
+            order = sorted(range(len(codes)), key=codes.__getitem__)
+            self.cache.put(key, {
+                "codes": [codes[i] for i in order],
+                "win_rates": [win_rates[i] for i in order],
+                "deals": deals,
+                "stopped_early": stopped_early,
+            })
+        return Evaluation(moves, win_rates, deals, stopped_early)
+
+    def is_best_clear(self, scores, deals):
+        """Check that the best move is better than the others.
+
+        Win rates are compared with confidence bounds of a normal
+        approximation; their variance is bounded with p * (1 - p) so that a
+        few deals with equal outcomes do not look certain.
+        """
+        if len(scores) < 2:
+            return True
+
+        rates = sorted((score / deals for score in scores), reverse=True)
+        best, second = rates[0], rates[1]
+        error = self.confidence * math.sqrt(
+            (max(best * (1 - best), 0.05) + max(second * (1 - second), 0.05))
+            / deals)
+        return best - second > error
+
+
+class MonteCarloStrategy(Strategy):
+    """Play the move with the highest Monte Carlo win rate estimate."""
+
+    def __init__(self, evaluator=None):
+        self.evaluator = evaluator if evaluator is not None \
+            else MonteCarloEvaluator()
+
+    def choose(self, state, moves):
+        if len(moves) == 1:
+            return moves[0]
+
+        evaluation = self.evaluator.evaluate(get_view(state), moves)
+        best = max(range(len(moves)), key=evaluation.win_rates.__getitem__)
+        return moves[best]
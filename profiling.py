@@ -0,0 +1,150 @@
+#! python3
+"""Opt-in instrumentation of DominoGame.
+
+A Profiler attached to a game (DominoGame(profiler=...)) wraps the methods
+of that game instance only, so games without a profiler run the plain
+methods without any overhead. It measures the phases of a turn:
+- command - getting the command of the current player (get_player_command),
+- validation - checking a command (get_command_error),
+- scoring - scoring dominoes of the computer (get_domino_scores),
+- move - applying the command (make_move without getting the command),
+- end_check - checking the end-game conditions (do_play_game),
+and counts moves, draws, passes, illegal commands and redeals.
+
+Snapshots are plain dicts, so profilers of many games or worker processes
+can be merged into one and exported as JSON.
+"""
+import json
+import time
+from collections import Counter
+
+from dominoes import DrawEvent, MoveEvent, PassEvent
+
+PHASES = {
+    "get_player_command": "command",
+    "get_command_error": "validation",
+    "get_domino_scores": "scoring",
+    "do_play_game": "end_check",
+}
+EVENT_COUNTERS = {MoveEvent: "moves", DrawEvent: "draws", PassEvent: "passes"}
+
+
+class Profiler:
+    """Per-phase timers and counters aggregated over games.
+
+    'timers' maps a phase to its [calls, total seconds] and 'counters' is a
+    Counter of events.
+    """
+
+    def __init__(self):
+        self.timers = {}
+        self.counters = Counter()
+
+    def __str__(self):
+        """Print a summary of the timers and counters."""
+        lines = []
+        for phase, (calls, total) in sorted(self.timers.items()):
+            mean = total / calls * 1e6 if calls else 0.0
+            lines.append(f"{phase:12}{calls:10} calls{total:12.6f} s"
+                         f"{mean:10.2f} us/call")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:12}{value:10}")
+        return "\n".join(lines)
+
+    def add_time(self, phase, seconds):
+        """Add a measured call of a phase."""
+        timer = self.timers.get(phase)
+        if timer is None:
+            self.timers[phase] = [1, seconds]
+        else:
+            timer[0] += 1
+            timer[1] += seconds
+
+    def count(self, name, value=1):
+        """Increase a counter."""
+        self.counters[name] += value
+
+    def instrument(self, game):
+        """Wrap the methods of a DominoGame instance to measure them.
+
+        A game is instrumented only once; methods of the class and of other
+        games are not changed.
+        """
+        if "make_move" in vars(game):
+            return
+
+        for method, phase in PHASES.items():
+            setattr(game, method, self._timed(getattr(game, method), phase))
+        game.make_move = self._timed_move(game.make_move)
+        game.get_command_error = self._counted_errors(game.get_command_error)
+
+    def _timed(self, method, phase):
+        """Wrap a bound method to time its calls as 'phase'."""
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.add_time(phase, clock() - start)
+        return timed
+
+    def _timed_move(self, make_move):
+        """Wrap make_move to time the move without getting the command."""
+        clock = time.perf_counter
+
+        def timed_move(command=None):
+            command_time = self.timers.get("command", (0, 0.0))[1]
+            start = clock()
+            event = make_move(command)
+            elapsed = clock() - start
+            command_time = self.timers.get("command", (0, 0.0))[1] \
+                - command_time
+            self.add_time("move", elapsed - command_time)
+            self.count(EVENT_COUNTERS[type(event)])
+            return event
+        return timed_move
+
+    def _counted_errors(self, get_command_error):
+        """Wrap get_command_error to count illegal commands."""
+        def counted(command):
+            error = get_command_error(command)
+            if error is not None:
+                self.count("illegal_commands")
+            return error
+        return counted
+
+    def snapshot(self):
+        """Get the timers and counters as a picklable dict."""
+        return {
+            "timers": {phase: {"calls": calls, "seconds": total}
+                       for phase, (calls, total) in self.timers.items()},
+            "counters": dict(self.counters),
+        }
+
+    def merge(self, snapshot):
+        """Add a snapshot of another profiler to this one."""
+        for phase, timer in snapshot["timers"].items():
+            calls, total = self.timers.get(phase, (0, 0.0))
+            self.timers[phase] = [calls + timer["calls"],
+                                  total + timer["seconds"]]
+        self.counters.update(snapshot["counters"])
+
+    def reset(self):
+        """Remove all measurements."""
+        self.timers = {}
+        self.counters = Counter()
+
+    def export(self, path):
+        """Write the snapshot to a JSON file."""
+        with open(path, "w") as file:
+            json.dump(self.snapshot(), file, indent=2)
+
+
+def merge_snapshots(snapshots):
+    """Merge snapshots, e.g. returned by worker processes, into a Profiler."""
+    profiler = Profiler()
+    for snapshot in snapshots:
+        profiler.merge(snapshot)
+    return profiler
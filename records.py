@@ -0,0 +1,279 @@
+#! python3
+"""Compact binary records of headless games.
+
+A record file starts with a HEADER_SIZE byte header followed by fixed-width
+RECORD_SIZE byte records, one per game:
+- seed - 64-bit seed the game was played with,
+- deck - the 28 domino ids in dealing order (see engine.deal),
+- winner - winning seat or -1 for a draw,
+- reason - index in REASONS,
+- turns - number of moves played after the starting double,
+- pips - remaining pip totals of both seats,
+- moves - the moves as codes (see encode_move) padded with NO_MOVE.
+
+Every game can be replayed from its deck and moves alone, whatever the
+strategies were. Files are only ever appended to, so several workers can
+share a file as long as every flush appends whole records.
+read_records memory-maps a file as a NumPy structured array without
+reading it into memory.
+"""
+import os
+import random
+import struct
+from collections import namedtuple
+
+from engine import DRAW, PASS
+from engine import GameResult
+from engine import deal, play_out
+from tiles import TILE_COUNT
+from tiles import iter_tiles, pip_total
+
+MAGIC = b"DOMREC"
+VERSION = 1
+# At most 27 placements, 14 draws and a pass before every placement but the
+# first one
+MAX_MOVES = 70
+REASONS = ("win", "draw", "blocked")
+
+SIDES = ("R", "L")
+DRAW_CODE = 2 * TILE_COUNT
+PASS_CODE = DRAW_CODE + 1
+NO_MOVE = 255
+
+_header = struct.Struct("<6sHH6x")
+_record = struct.Struct(f"<Q{TILE_COUNT}sbBH2B{MAX_MOVES}s")
+HEADER_SIZE = _header.size
+RECORD_SIZE = _record.size
+
+Record = namedtuple("Record", ["seed", "deck", "winner", "reason", "turns",
+                               "pips", "moves"])
+Record.__doc__ = """A game record.
+
+seed - seed the game was played with,
+deck - domino ids in dealing order,
+winner - winning seat (0 or 1) or None for a draw,
+reason - 'win', 'draw' or 'blocked',
+turns - number of moves played after the starting double,
+pips - remaining pip totals of both seats,
+moves - moves in engine format.
+"""
+
+
+def encode_move(move):
+    """Get the code of an engine move: tile * 2 + side, DRAW_CODE or
+    PASS_CODE."""
+    if move == DRAW:
+        return DRAW_CODE
+    if move == PASS:
+        return PASS_CODE
+    tile, side = move
+    return 2 * tile + SIDES.index(side)
+
+
+def decode_move(code):
+    """Get the engine move of a move code."""
+    if code == DRAW_CODE:
+        return DRAW
+    if code == PASS_CODE:
+        return PASS
+    if not 0 <= code < DRAW_CODE:
+        raise ValueError(f"Invalid move code: {code}.")
+    return code >> 1, SIDES[code & 1]
+
+
+def get_deck(state):
+    """Get a dealing order of a freshly dealt GameState.
+
+    The hands are listed in domino id order, so the deck differs from the
+    shuffled one but deals the same hands and the same stock.
+    """
+    hands = list(state.hands)
+    hands[1 - state.turn] |= state.played
+    deck = []
+    for hand in hands:
+        deck.extend(iter_tiles(hand))
+    return deck + state.stock
+
+
+def record_game(strategies, seed=None):
+    """Play a complete game and record it.
+
+    Arguments:
+        strategies(sequence): Strategy objects for seat 0 and seat 1;
+        seed(int): 64-bit seed of the game (default None - random).
+
+    Returns:
+        Record: the record of the game.
+    """
+    if seed is None:
+        seed = random.getrandbits(64)
+    state = deal(random.Random(seed))
+    deck = get_deck(state)
+    moves = []
+    (reason, winner), turns = play_out(state, strategies, moves)
+    pips = tuple(pip_total(hand) for hand in state.hands)
+    return Record(seed, deck, winner, reason, turns, pips, moves)
+
+
+def to_result(record):
+    """Get the GameResult of a Record."""
+    return GameResult(record.winner, record.reason, record.turns, record.pips,
+                      record.seed)
+
+
+def pack_record(record):
+    """Pack a Record into RECORD_SIZE bytes."""
+    if len(record.moves) > MAX_MOVES:
+        raise ValueError(f"A record holds at most {MAX_MOVES} moves.")
+
+    winner = -1 if record.winner is None else record.winner
+    moves = bytes(encode_move(move) for move in record.moves)
+    return _record.pack(record.seed, bytes(record.deck), winner,
+                        REASONS.index(record.reason), record.turns,
+                        *record.pips, moves.ljust(MAX_MOVES, b"\xff"))
+
+
+def unpack_record(data):
+    """Unpack a Record from RECORD_SIZE bytes."""
+    seed, deck, winner, reason, turns, pip0, pip1, moves = \
+        _record.unpack(data)
+    return Record(seed, list(deck), None if winner == -1 else winner,
+                  REASONS[reason], turns, (pip0, pip1),
+                  [decode_move(code) for code in moves[:turns]])
+
+
+def replay(record):
+    """Replay a recorded game.
+
+    Arguments:
+        record(Record): the record of the game.
+
+    Returns:
+        GameState: the final state of the game.
+
+    Raises:
+        ValueError: when the moves are not legal in the game;
+    """
+    state = deal(None, record.deck)
+    for move in record.moves:
+        if state.get_outcome() is not None or move not in state.get_moves():
+            raise ValueError(f"Illegal move in the record: {move}.")
+        state.apply(move)
+    return state
+
+
+def _check_header(data, path):
+    """Raise ValueError if 'data' is not a valid record file header."""
+    magic, version, record_size = _header.unpack(data)
+    if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+        raise ValueError(f"{path} is not a game record file of version "
+                         f"{VERSION}.")
+
+
+class RecordWriter:
+    """Append game records to a file.
+
+    Records are buffered and written to the end of the file at once per
+    flush. A short write, which a signal, a full disk or some network file
+    systems can cause, is continued until the buffer is written, so the
+    file only ever holds whole records.
+    """
+
+    def __init__(self, path, buffer_size=1024):
+        """Open a record file for appending, creating it if needed.
+
+        Arguments:
+            path(str): path of the file;
+            buffer_size(int): number of records written at once.
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self._buffer = []
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+                           0o666)
+        if os.fstat(self._fd).st_size == 0:
+            self._write(_header.pack(MAGIC, VERSION, RECORD_SIZE))
+        else:
+            with open(path, "rb") as file:
+                _check_header(file.read(HEADER_SIZE), path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, record):
+        """Add a Record to the file."""
+        self._buffer.append(pack_record(record))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def _write(self, data):
+        """Append all bytes of 'data' to the file.
+
+        Raises:
+            OSError: when the file does not take any more bytes;
+        """
+        data = memoryview(data)
+        while data:
+            written = os.write(self._fd, data)
+            if not written:
+                raise OSError(f"Could not write records to '{self.path}'.")
+            data = data[written:]
+
+    def flush(self):
+        """Write the buffered records to the file."""
+        if self._buffer:
+            self._write(b"".join(self._buffer))
+            self._buffer = []
+
+    def close(self):
+        """Write the buffered records and close the file."""
+        if self._fd is not None:
+            try:
+                self.flush()
+            finally:
+                os.close(self._fd)
+                self._fd = None
+
+
+def get_dtype():
+    """Get the NumPy structured data type of a record."""
+    import numpy as np
+
+    return np.dtype([
+        ("seed", "<u8"),
+        ("deck", "u1", (TILE_COUNT,)),
+        ("winner", "i1"),
+        ("reason", "u1"),
+        ("turns", "<u2"),
+        ("pips", "u1", (2,)),
+        ("moves", "u1", (MAX_MOVES,)),
+    ])
+
+
+def read_records(path):
+    """Memory-map a record file.
+
+    Returns:
+        numpy.ndarray: read-only structured array of the records with the
+            fields of get_dtype.
+
+    Raises:
+        ValueError: when the file is not a record file;
+    """
+    import numpy as np
+
+    with open(path, "rb") as file:
+        _check_header(file.read(HEADER_SIZE), path)
+    games = (os.path.getsize(path) - HEADER_SIZE) // RECORD_SIZE
+    if not games:
+        return np.zeros(0, dtype=get_dtype())
+    return np.memmap(path, dtype=get_dtype(), mode="r", offset=HEADER_SIZE,
+                     shape=(games,))
+
+
+def from_array(row):
+    """Get the Record of a row of an array returned by read_records."""
+    return unpack_record(row.tobytes())
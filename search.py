@@ -0,0 +1,313 @@
+#! python3
+"""Search support for engine game states.
+
+Once the stock is empty, the dominoes a seat does not hold and which are not
+in the snake are all in the hand of the other seat, so the game has no
+hidden information left and EndgameSolver settles it exactly.
+"""
+import time
+
+from cache import get_state_key
+from engine import RarityStrategy, Strategy
+from tiles import PIP_MASKS, TILES
+from tiles import count
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class TranspositionTable:
+    """A bounded table of search results keyed by position hashes.
+
+    Entries are kept in 'size' slots (rounded up to a power of two) indexed by
+    the low bits of the hash; every entry keeps the full hash, so a different
+    position in the same slot is a miss. An entry is replaced by a new one
+    when the new one was searched at least as deep or when the old one was
+    stored during an earlier search (see new_search).
+
+    Entries are (key, depth, value, flag, move, generation) tuples, where
+    'flag' tells whether the value is EXACT, a LOWER or an UPPER bound.
+    """
+
+    def __init__(self, size=1 << 20):
+        size = 1 << max(size - 1, 1).bit_length()
+        self.slots = [None] * size
+        self.index_mask = size - 1
+        self.generation = 0
+        self.hits = self.misses = self.stores = self.replacements = 0
+
+    def __len__(self):
+        """Get the number of occupied slots."""
+        return len(self.slots) - self.slots.count(None)
+
+    def get(self, key, current=False):
+        """Get the entry stored for the hash or None.
+
+        With 'current' entries stored before the last new_search are
+        ignored.
+        """
+        entry = self.slots[key & self.index_mask]
+        if entry is not None and entry[0] == key \
+                and (not current or entry[5] == self.generation):
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        return None
+
+    def put(self, key, depth, value, flag=EXACT, move=None):
+        """Store a search result unless a more valuable entry holds the slot.
+
+        Returns:
+            bool: True if the result was stored.
+        """
+        index = key & self.index_mask
+        entry = self.slots[index]
+        if entry is not None:
+            if entry[0] != key and entry[5] == self.generation \
+                    and entry[1] > depth:
+                return False
+            if entry[0] != key:
+                self.replacements += 1
+
+        self.slots[index] = (key, depth, value, flag, move, self.generation)
+        self.stores += 1
+        return True
+
+    def new_search(self):
+        """Mark the stored entries as older than the following ones."""
+        self.generation += 1
+
+    def clear(self):
+        """Remove all entries and reset the statistics."""
+        self.slots = [None] * len(self.slots)
+        self.generation = 0
+        self.hits = self.misses = self.stores = self.replacements = 0
+
+    def get_stats(self):
+        """Get hit/miss statistics of the table as a dict."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.slots),
+            "used": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "replacements": self.replacements,
+        }
+
+
+def to_entry_move(state, move):
+    """Get a move as stored in a table: (tile, number of the end).
+
+    Mirrored snakes hash the same, so a stored placement names the number it
+    is placed on instead of the side of the snake.
+    """
+    if move.__class__ is not tuple:
+        return move
+    tile, side = move
+    return tile, state.right if side == "R" else state.left
+
+
+def from_entry_move(state, move):
+    """Get the move of a state from a move stored in a table."""
+    if move.__class__ is not tuple:
+        return move
+    tile, number = move
+    return tile, "R" if number == state.right else "L"
+
+
+class SearchAborted(Exception):
+    """Raised when a search runs out of its node or time budget."""
+
+
+class EndgameSolver:
+    """A memoized alpha-beta solver of games with an empty stock.
+
+    Values are given for the seat to move: 1 for a win, 0 for a draw and -1
+    for a loss; blocked games are decided by the pip totals like in the
+    engine.
+
+    A search uses only the table entries stored by itself and tries the
+    moves in an order that does not depend on the side of the snake, so the
+    result of a position (and whether its node budget suffices) does not
+    depend on earlier searches or on mirroring the snake.
+    """
+
+    def __init__(self, table=None, max_nodes=1000000, time_limit=None):
+        """Initialize a solver.
+
+        Arguments:
+            table(TranspositionTable): table shared by the searches, a new one
+                by default;
+            max_nodes(int): maximum number of positions visited by a search;
+            time_limit(float): maximum duration of a search in seconds
+                (default None - no limit).
+        """
+        self.table = table if table is not None else TranspositionTable(1 << 18)
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.nodes = 0
+        self._deadline = None
+
+    def solve(self, state):
+        """Find the value and the best move of the seat to move.
+
+        Returns:
+            tuple: (value, move) or None when the budget was used up.
+
+        Raises:
+            ValueError: when the stock is not empty or the game is over;
+        """
+        if state.stock:
+            raise ValueError("Only games with an empty stock can be solved.")
+        if state.get_outcome() is not None:
+            raise ValueError("The game is already over.")
+
+        self.nodes = 1
+        self._deadline = None
+        if self.time_limit is not None:
+            self._deadline = time.perf_counter() + self.time_limit
+        self.table.new_search()
+
+        state = state.clone().track()
+        alpha = -1
+        best_value, best_move = -2, None
+        try:
+            # The first move of the best value is chosen, so unlike a move
+            # from the table it is always a move of this snake
+            for move in self._get_ordered_moves(state):
+                value = self._get_move_value(state, move, alpha, 1)
+                if value > best_value:
+                    best_value, best_move = value, move
+                    alpha = max(alpha, value)
+                    if alpha >= 1:
+                        break
+        except SearchAborted:
+            return None
+        return best_value, best_move
+
+    @classmethod
+    def _get_ordered_moves(cls, state):
+        """Get the moves of a state in the search order.
+
+        Moves leaving the other seat fewer replies are searched first, which
+        makes alpha-beta cutoffs come sooner; ties are ordered by the domino
+        and the number it is placed on.
+        """
+        moves = state.get_moves()
+        if len(moves) > 1:
+            moves.sort(key=lambda move: (cls._replies(state, move),
+                                         to_entry_move(state, move)))
+        return moves
+
+    def _get_move_value(self, state, move, alpha, beta):
+        """Get the value of a move for the seat making it."""
+        state.apply(move)
+        outcome = state.get_outcome()
+        if outcome is None:
+            value = -self._negamax(state, -beta, -alpha)
+        elif outcome[1] is None:
+            value = 0
+        else:
+            # The seat that made the move is not the one to move now
+            value = 1 if outcome[1] != state.turn else -1
+        state.undo(move)
+        return value
+
+    @staticmethod
+    def _replies(state, move):
+        """Count dominoes of the other seat that fit the snake after a move."""
+        tile, side = move
+        a, b = TILES[tile]
+        left, right = state.left, state.right
+        if side == "R":
+            right = b if a == right else a
+        else:
+            left = b if a == left else a
+        other = state.hands[1 - state.turn]
+        return count(other & (PIP_MASKS[left] | PIP_MASKS[right]))
+
+    def _negamax(self, state, alpha, beta):
+        """Search a position and return its value for the seat to move."""
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise SearchAborted("Node budget exceeded.")
+        if self._deadline is not None and not self.nodes & 1023 \
+                and time.perf_counter() > self._deadline:
+            raise SearchAborted("Time budget exceeded.")
+
+        key = state.zobrist
+        moves = self._get_ordered_moves(state)
+        entry = self.table.get(key, current=True)
+        if entry is not None:
+            value, flag, move = entry[2:5]
+            if flag == EXACT:
+                return value
+            if flag == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+            move = from_entry_move(state, move)
+            if move in moves:
+                moves.remove(move)
+                moves.insert(0, move)
+
+        original_alpha = alpha
+        best_value, best_move = -2, None
+        for move in moves:
+            value = self._get_move_value(state, move, alpha, beta)
+            if value > best_value:
+                best_value, best_move = value, move
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+
+        if best_value <= original_alpha:
+            flag = UPPER
+        elif best_value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        depth = count(state.hands[0] | state.hands[1])
+        self.table.put(key, depth, best_value, flag,
+                       to_entry_move(state, best_move))
+        return best_value
+
+
+class EndgameStrategy(Strategy):
+    """Play perfectly once the stock is empty.
+
+    Earlier in the game, or when the solver runs out of its budget, the
+    'fallback' strategy chooses the move. The budget is a number of nodes by
+    default, so the moves depend only on the position and games can be
+    replayed from their seeds; a 'time_limit' bounds the time of a move, but
+    then the moves depend on the speed of the machine. Solved moves can be
+    kept in an EvaluationCache ('cache') shared with other processes and
+    later runs.
+    """
+
+    def __init__(self, fallback=None, max_nodes=200000, time_limit=None,
+                 cache=None):
+        self.fallback = fallback if fallback is not None else RarityStrategy()
+        self.solver = EndgameSolver(max_nodes=max_nodes, time_limit=time_limit)
+        self.cache = cache
+
+    def choose(self, state, moves):
+        if not state.stock and len(moves) > 1:
+            if self.cache is not None:
+                key, codes = get_state_key("endgame", state, moves)
+                code = self.cache.get(key)
+                if code is not None:
+                    return moves[codes.index(code)]
+
+            solution = self.solver.solve(state)
+            if solution is not None:
+                if self.cache is not None:
+                    self.cache.put(key, codes[moves.index(solution[1])])
+                return solution[1]
+
+        return self.fallback.choose(state, moves)
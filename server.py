@@ -0,0 +1,220 @@
+#! python3
+"""Asyncio server hosting domino games over a line-based TCP protocol.
+
+Every connection plays its own DominoGame against the computer. The server
+sends the board before every turn of the player and the player answers with
+the commands of the console game, one per line:
+- '3' places the third domino on the right side of the snake,
+- '-3' places it on the left side,
+- '0' takes a domino from the stock (or skips the turn),
+- 'quit' ends the session.
+
+All sessions share one event loop. Computer turns of games with an engine
+strategy run in a thread pool, so slow strategies do not stall the other
+sessions. A session without a command for 'idle_timeout' seconds is
+closed.
+
+Usage:
+    python server.py --port 8765
+"""
+import argparse
+import asyncio
+import itertools
+import time
+
+from dominoes import DominoGame
+
+END_MESSAGES = {
+    None: "Status: The game is over. It's a draw!",
+    "player": "Status: The game is over. You won!",
+    "computer": "Status: The game is over. The computer won!",
+}
+
+
+class Session:
+    """A game played over a single connection.
+
+    Latency is the time from receiving a command of the player to sending
+    the answer, including the computer turns played in between.
+    """
+
+    def __init__(self, session_id, game):
+        self.id = session_id
+        self.game = game
+        self.started = time.monotonic()
+        self.commands = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def add_latency(self, latency):
+        """Add the latency of a processed command to the metrics."""
+        self.commands += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def get_stats(self):
+        """Get metrics of the session as a dict."""
+        return {
+            "id": self.id,
+            "duration": time.monotonic() - self.started,
+            "commands": self.commands,
+            "mean_latency": self.total_latency / self.commands
+            if self.commands else 0.0,
+            "max_latency": self.max_latency,
+        }
+
+
+class GameServer:
+    """A TCP server with a DominoGame session per connection."""
+
+    def __init__(self, host="127.0.0.1", port=8765, idle_timeout=300,
+                 game_factory=DominoGame, backlog=1024):
+        """Initialize a server.
+
+        Arguments:
+            host(str): address to listen on;
+            port(int): port to listen on, 0 picks a free one;
+            idle_timeout(float): seconds a player may take to send a command
+                before the session is closed;
+            game_factory(callable): function creating a new game;
+            backlog(int): maximum number of pending connections.
+        """
+        self.host = host
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self.game_factory = game_factory
+        self.backlog = backlog
+        self.sessions = {}
+        self.finished = 0
+        self.evicted = 0
+        self._ids = itertools.count(1)
+        self._server = None
+
+    async def start(self):
+        """Start listening; the actual port is stored in 'port'."""
+        self._server = await asyncio.start_server(
+            self.handle, self.host, self.port, backlog=self.backlog)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """Start the server and serve connections until cancelled."""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Stop listening and wait until the server is closed."""
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def handle(self, reader, writer):
+        """Play a game with the client of a connection."""
+        session = Session(next(self._ids), self.game_factory())
+        self.sessions[session.id] = session
+        try:
+            await self.play(session, reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            del self.sessions[session.id]
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def play(self, session, reader, writer):
+        """Play the game of a session until it is over or abandoned."""
+        game = session.game
+        received = None
+        while True:
+            while game.status == "computer" and game.do_play_game()[0]:
+                game.make_move(await self.get_computer_command(game))
+
+            running, result = game.do_play_game()
+            if running:
+                writer.write(f"{game}\n".encode())
+            else:
+                message = END_MESSAGES[game.get_winner(result)]
+                writer.write(f"{message}\n".encode())
+            await writer.drain()
+            if received is not None:
+                session.add_latency(time.perf_counter() - received)
+            if not running:
+                self.finished += 1
+                return
+
+            while True:
+                command = await self.read_command(reader, writer)
+                if command is None:
+                    return
+
+                received = time.perf_counter()
+                error = game.get_command_error(command)
+                if error is None:
+                    break
+                writer.write(f"{error}\n".encode())
+                await writer.drain()
+                session.add_latency(time.perf_counter() - received)
+                received = None
+
+            game.make_move(command)
+
+    async def read_command(self, reader, writer):
+        """Read a command of the player.
+
+        Returns:
+            str: the command or None when the session is over.
+        """
+        try:
+            line = await asyncio.wait_for(reader.readline(),
+                                          self.idle_timeout)
+        except asyncio.TimeoutError:
+            self.evicted += 1
+            writer.write(b"Session closed due to inactivity.\n")
+            await writer.drain()
+            return None
+
+        command = line.decode(errors="replace").strip()
+        if not line or command == "quit":
+            return None
+        return command
+
+    @staticmethod
+    async def get_computer_command(game):
+        """Get a command of the computer without blocking the event loop."""
+        if game.strategy is None:
+            return game.get_computer_command()
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, game.get_strategy_command,
+                                          game.strategy)
+
+    def get_stats(self):
+        """Get metrics of the server and its sessions as a dict."""
+        sessions = [session.get_stats() for session in self.sessions.values()]
+        return {
+            "active": len(sessions),
+            "finished": self.finished,
+            "evicted": self.evicted,
+            "sessions": sessions,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--idle-timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    server = GameServer(args.host, args.port, args.idle_timeout)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#! python3
+"""Unit test script for testing the vectorized batch simulator."""
+import unittest
+
+import numpy as np
+
+from batch import REASONS
+from batch import deal_batch
+from batch import play_batch
+from engine import RarityStrategy
+from engine import play_game
+from tiles import TILES
+
+
+class TestBatch(unittest.TestCase):
+    """Class for testing batch module."""
+
+    def test_deal_batch(self):
+        """Test that every deck is a permutation dealing a double."""
+        decks = deal_batch(500, np.random.default_rng(42))
+
+        self.assertEqual(decks.shape, (500, 28))
+        self.assertTrue((np.sort(decks, axis=1) == np.arange(28)).all())
+        for deck in decks:
+            self.assertTrue(any(TILES[t][0] == TILES[t][1] for t in deck[:14]))
+
+    def test_play_batch01(self):
+        """Test that batch games match the engine games with the same deck."""
+        decks = deal_batch(300, np.random.default_rng(42))
+        result = play_batch(decks=decks)
+
+        strategies = [RarityStrategy(), RarityStrategy()]
+        for i, deck in enumerate(decks):
+            game = play_game(strategies, deck=deck.tolist())
+            winner = -1 if game.winner is None else game.winner
+            self.assertEqual(result.winner[i], winner)
+            self.assertEqual(REASONS[result.reason[i]], game.reason)
+            self.assertEqual(result.turns[i], game.turns)
+            self.assertEqual(tuple(result.pips[i]), game.pips)
+
+    def test_play_batch02(self):
+        """Test random policies and argument validation."""
+        result = play_batch(200, seed=1, policies=("random", "rarity"))
+
+        self.assertTrue((result.reason >= 0).all())
+        won = result.winner >= 0
+        self.assertTrue((result.pips[won, result.winner[won]] == 0).all())
+        self.assertRaises(ValueError, play_batch, 10, policies=("x", "rarity"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,59 @@
+#! python3
+"""Unit test script for testing the benchmark suite."""
+import unittest
+
+from benchmark import BENCHMARKS, STARTUP
+from benchmark import compare, make_game, measure_startup, run
+
+
+class TestBenchmark(unittest.TestCase):
+    """Class for testing benchmark module."""
+
+    def test_run(self):
+        """Test that all benchmarks run and report their speed."""
+        results = run(repeat=1, min_time=0.001)
+        self.assertEqual(set(results["benchmarks"]), {*BENCHMARKS, STARTUP})
+        for result in results["benchmarks"].values():
+            self.assertGreater(result["calls_per_sec"], 0)
+
+    def test_make_game(self):
+        """Test that the benchmarked game is in play."""
+        game = make_game()
+        self.assertEqual(game.status, "computer")
+        self.assertEqual(game.do_play_game(), (True, None))
+        self.assertNotEqual(game.get_computer_command(), "0")
+
+    def test_startup(self):
+        """Test that the first move is made quickly and without NumPy."""
+        seconds, numpy_imported, modules = measure_startup(repeat=3)
+        self.assertFalse(numpy_imported)
+        self.assertLess(seconds, 0.1)
+        self.assertGreater(modules, 0)
+
+    def test_compare(self):
+        """Test that only slowdowns above the threshold are reported."""
+        baseline = {"benchmarks": {"a": {"usec_per_call": 10.0},
+                                   "b": {"usec_per_call": 10.0}}}
+        results = {"benchmarks": {"a": {"usec_per_call": 11.0},
+                                  "b": {"usec_per_call": 13.0},
+                                  "c": {"usec_per_call": 99.0}}}
+        self.assertEqual(compare(results, baseline, threshold=0.2),
+                         [("b", 1.3)])
+
+    def test_compare_startup(self):
+        """Test that the startup gets a wider threshold and a module count."""
+        baseline = {"python": "3", "benchmarks": {
+            STARTUP: {"usec_per_call": 5000.0, "modules": 40}}}
+        results = {"python": "3", "benchmarks": {
+            STARTUP: {"usec_per_call": 8000.0, "modules": 40}}}
+        self.assertEqual(compare(results, baseline), [])
+
+        results["benchmarks"][STARTUP]["modules"] = 50
+        self.assertEqual(compare(results, baseline),
+                         [(f"{STARTUP} modules", 1.25)])
+        results["python"] = "4"
+        self.assertEqual(compare(results, baseline), [])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,216 @@
+#! python3
+"""Unit test script for testing the persistent evaluation cache."""
+import multiprocessing
+import os
+import pickle
+import random
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from cache import EvaluationCache
+from cache import get_state_key, get_view_key
+from engine import RarityStrategy
+from engine import deal
+from engine import make_state
+from engine import play_game
+from montecarlo import MonteCarloEvaluator
+from montecarlo import get_view
+from search import EndgameStrategy
+
+
+def store_range(cache, start, stop):
+    """Store entries from a worker process."""
+    for i in range(start, stop):
+        cache.put(f"key{i}", i)
+
+
+def evict(cache):
+    """Evict entries from a worker process."""
+    return cache.evict()
+
+
+def make_mirrored_states(seed=5):
+    """Get a state and the same state with a mirrored snake."""
+    state = deal(random.Random(seed))
+    while state.left == state.right or len(state.get_moves()) < 2:
+        state.apply(state.get_moves()[0])
+    mirror = make_state(state.hands, state.stock, state.played, state.right,
+                        state.left, state.turn)
+    return state, mirror
+
+
+class TestEvaluationCache(unittest.TestCase):
+    """Class for testing EvaluationCache class."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "cache.db")
+
+    def make_cache(self, **kwargs):
+        cache = EvaluationCache(self.path, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_get_put(self):
+        """Test storing values and the statistics."""
+        cache = self.make_cache()
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", {"deals": 3, "win_rates": [0.5, 0.25]})
+        cache.put("b", 1)
+        cache.put("b", 2)
+
+        self.assertEqual(cache.get("a"),
+                         {"deals": 3, "win_rates": [0.5, 0.25]})
+        self.assertEqual(cache.get("b"), 2)
+        stats = cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["stores"]),
+                         (2, 1, 3))
+        self.assertAlmostEqual(stats["hit_rate"], 2 / 3)
+        self.assertEqual(stats["used"], 2)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.get_stats()["hits"], 0)
+
+    def test_persistence(self):
+        """Test that entries outlive the cache object."""
+        with EvaluationCache(self.path) as cache:
+            cache.put("a", [1, 2])
+        self.assertEqual(self.make_cache().get("a"), [1, 2])
+
+    def test_eviction(self):
+        """Test that least recently used entries are evicted."""
+        cache = self.make_cache(max_entries=3)
+        for key in "abc":
+            cache.put(key, key)
+        cache.get("a")
+        cache.put("d", "d")
+
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.evictions, 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "a")
+
+    def test_flush(self):
+        """Test that hits are written on flush, not on every read."""
+        cache = self.make_cache()
+        cache.put("a", 1)
+        connection = sqlite3.connect(self.path)
+        self.addCleanup(connection.close)
+        query = "SELECT used FROM entries WHERE key = 'a'"
+        used = connection.execute(query).fetchone()[0]
+
+        with patch("time.time", return_value=used + 10):
+            cache.get("a")
+        self.assertEqual(connection.execute(query).fetchone()[0], used)
+        cache.flush()
+        self.assertEqual(connection.execute(query).fetchone()[0], used + 10)
+
+    def test_processes(self):
+        """Test that worker processes share a pickled cache."""
+        cache = self.make_cache()
+        cache.put("parent", 0)
+        copy = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(copy.get("parent"), 0)
+        copy.close()
+
+        with multiprocessing.Pool(2) as pool:
+            pool.starmap(store_range, [(cache, 0, 50), (cache, 50, 100)])
+        self.assertEqual(len(cache), 101)
+        self.assertEqual(cache.get("key75"), 75)
+
+    def test_concurrent_eviction(self):
+        """Test that processes evicting at once remove the excess once."""
+        cache = self.make_cache(max_entries=1000)
+        store_range(cache, 0, 100)
+        cache.max_entries = 10
+        with multiprocessing.Pool(4) as pool:
+            evicted = pool.map(evict, [cache] * 8)
+        self.assertEqual(sum(evicted), 90)
+        self.assertEqual(len(cache), 10)
+
+
+class TestKeys(unittest.TestCase):
+    """Class for testing canonical position keys."""
+
+    def setUp(self):
+        self.state, self.mirror = make_mirrored_states()
+
+    def test_mirrored_snake(self):
+        """Test that mirrored snakes share keys with mirrored moves."""
+        moves = self.state.get_moves()
+        mirrored_moves = [(tile, "L" if side == "R" else "R")
+                          for tile, side in moves]
+
+        key, codes = get_view_key("test", get_view(self.state), moves)
+        mirror_key, mirror_codes = get_view_key(
+            "test", get_view(self.mirror), mirrored_moves)
+        self.assertEqual(key, mirror_key)
+        self.assertEqual(codes, mirror_codes)
+        self.assertEqual(get_view_key("test", get_view(self.state),
+                                      moves[::-1])[0], key)
+
+    def test_seats(self):
+        """Test that keys are taken from the view of the seat to move."""
+        moves = self.state.get_moves()
+        other = make_state(self.state.hands[::-1], self.state.stock,
+                           self.state.played, self.state.left,
+                           self.state.right, 1 - self.state.turn)
+        self.assertEqual(get_state_key("test", self.state, moves),
+                         get_state_key("test", other, moves))
+        self.assertNotEqual(get_state_key("test", self.state, moves)[0],
+                            get_state_key("other", self.state, moves)[0])
+
+
+class TestCachedStrategies(unittest.TestCase):
+    """Class for testing strategies with a cache."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = EvaluationCache(os.path.join(directory.name, "cache.db"))
+        self.addCleanup(self.cache.close)
+
+    def test_montecarlo(self):
+        """Test that a cached evaluation is reused for a mirrored snake."""
+        state, mirror = make_mirrored_states()
+        moves = state.get_moves()
+        evaluator = MonteCarloEvaluator(processes=1, time_limit=60,
+                                        max_deals=50, confidence=100, seed=1,
+                                        cache=self.cache)
+        evaluation = evaluator.evaluate(get_view(state), moves)
+
+        mirrored_moves = [(tile, "L" if side == "R" else "R")
+                          for tile, side in moves[::-1]]
+        cached = evaluator.evaluate(get_view(mirror), mirrored_moves)
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(cached.deals, 50)
+        self.assertEqual(cached.win_rates, evaluation.win_rates[::-1])
+
+        other = MonteCarloEvaluator(processes=1, time_limit=60, max_deals=60,
+                                    confidence=100, seed=1, cache=self.cache)
+        self.assertEqual(other.evaluate(get_view(state), moves).deals, 60)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_endgame(self):
+        """Test that cached solutions play the same games."""
+        for seed in range(30):
+            plain = play_game([EndgameStrategy(), RarityStrategy()], seed)
+            cached = play_game([EndgameStrategy(cache=self.cache),
+                                RarityStrategy()], seed)
+            self.assertEqual(plain, cached)
+        self.assertGreater(self.cache.stores, 0)
+
+        stores = self.cache.stores
+        for seed in range(30):
+            play_game([EndgameStrategy(cache=self.cache), RarityStrategy()],
+                      seed)
+        self.assertEqual(self.cache.stores, stores)
+        self.assertGreater(self.cache.get_stats()["hit_rate"], 0.4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+#! python3
+"""Unit test script for testing the sequential strategy comparison."""
+import unittest
+
+from compare import CompareResult
+from compare import compare, expected_score, get_bounds, play_pairs, to_elo
+from engine import RandomStrategy
+from engine import RarityStrategy
+
+
+class TestCompare(unittest.TestCase):
+    """Class for testing compare module."""
+
+    def setUp(self):
+        self.strategies = [RarityStrategy(), RandomStrategy()]
+
+    def test_elo(self):
+        """Test conversions between Elo differences and scores."""
+        self.assertEqual(expected_score(0), 0.5)
+        self.assertAlmostEqual(expected_score(400), 10 / 11)
+        for elo in (-200, -10, 0, 35, 300):
+            self.assertAlmostEqual(to_elo(expected_score(elo)), elo)
+
+    def test_add_pair(self):
+        """Test that pairs are counted by the score of both games."""
+        result = CompareResult()
+        result.add_pair(1.0, 0.0)
+        result.add_pair(1.0, 0.5)
+        result.add_pair(1.0, 1.0)
+
+        self.assertEqual(result.pairs, [0, 0, 1, 1, 1])
+        self.assertEqual((result.wins, result.draws, result.losses),
+                         (4, 1, 1))
+        self.assertAlmostEqual(result.get_mean(), 0.75)
+
+    def test_play_pairs(self):
+        """Test that chunks of pairs add up to the whole range."""
+        whole = play_pairs(self.strategies, 3, 0, 40)
+        chunks = CompareResult()
+        for start in range(0, 40, 15):
+            chunks.merge(play_pairs(self.strategies, 3, start,
+                                    min(start + 15, 40)))
+
+        self.assertEqual(whole.get_size(), 40)
+        self.assertEqual(whole.wins + whole.draws + whole.losses, 80)
+        self.assertEqual(whole.pairs, chunks.pairs)
+
+    def test_swapped_seats(self):
+        """Test that a strategy against itself scores evenly in a pair."""
+        strategy = RarityStrategy()
+        result = play_pairs([strategy, strategy], 0, 0, 20)
+        self.assertEqual(result.pairs, [0, 0, 20, 0, 0])
+
+    def test_compare(self):
+        """Test that a stronger strategy is detected early."""
+        lower, upper = get_bounds(0.05, 0.05)
+        result, llr, accepted = compare(self.strategies, 0, 10, seed=1,
+                                        batch_size=100, processes=1)
+
+        self.assertEqual(accepted, "H1")
+        self.assertGreaterEqual(llr, upper)
+        self.assertLess(result.get_size(), 5000)
+        self.assertGreater(result.get_elo()[1], 0)
+
+        reverse = compare(self.strategies[::-1], 0, 10, seed=1,
+                          batch_size=100, processes=1)
+        self.assertEqual(reverse[2], "H0")
+        self.assertLessEqual(reverse[1], lower)
+
+    def test_processes(self):
+        """Test that results do not depend on the worker processes."""
+        single = compare(self.strategies, 0, 10, batch_size=60,
+                         max_pairs=120, processes=1)
+        pooled = compare(self.strategies, 0, 10, batch_size=60,
+                         max_pairs=120, processes=2, chunk_size=7)
+        self.assertEqual(single[0].pairs, pooled[0].pairs)
+        self.assertEqual(single[1], pooled[1])
+
+    def test_max_pairs(self):
+        """Test that the comparison stops without a decision."""
+        result, llr, accepted = compare(self.strategies, 0, 10,
+                                        batch_size=5, max_pairs=5,
+                                        processes=1)
+        self.assertEqual(result.get_size(), 5)
+        self.assertIsNone(accepted)
+
+
+if __name__ == "__main__":
+    unittest.main()
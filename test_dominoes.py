@@ -1,10 +1,19 @@
 #! python3
 """Unit test script for testing class regarding domino game."""
+import io
 import random
 import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
 
+from dominoes import DealEvent, DrawEvent, EndEvent, MoveEvent, PassEvent
 from dominoes import Domino
+from dominoes import DominoGame
 from dominoes import DominoSet
+from dominoes import Snake
+from dominoes import StartEvent
+from dominoes import print_events
+from engine import RarityStrategy
 
 
 class TestDomino(unittest.TestCase):
@@ -16,13 +25,33 @@ class TestDomino(unittest.TestCase):
 
     def test_switch_numbers(self):
         """Test switch numbers method."""
-        answer = Domino([1, 0]).numbers
+        answer = [1, 0]
 
         piece = Domino([0, 1])
-        piece.switch_numbers()
-        output = piece.numbers
+        output = piece.switch_numbers()
 
         self.assertEqual(output, answer)
+        self.assertEqual(piece.numbers, [0, 1])    # piece is not mutated
+
+    def test_interning(self):
+        """Test that domino pieces are shared and immutable."""
+        self.assertIs(Domino([0, 1]), Domino([1, 0]))
+        self.assertIs(Domino([6, 6]), Domino((6, 6)))
+        self.assertIs(DominoSet().dominoes[1], Domino([0, 1]))
+
+        piece = Domino([2, 5])
+        self.assertRaises(AttributeError, setattr, piece, "id", 0)
+        piece.numbers.reverse()
+        self.assertEqual(piece.numbers, [2, 5])
+
+    def test_double_n(self):
+        """Test pieces of larger double-N sets."""
+        piece = Domino([12, 3], 12)
+        self.assertIs(piece, Domino([3, 12], max_pip=12))
+        self.assertEqual((piece.numbers, piece.max_pip), ([3, 12], 12))
+        self.assertIsNot(Domino([3, 4], 12), Domino([3, 4]))
+        self.assertRaises(ValueError, Domino, [7, 1])
+        self.assertRaises(ValueError, Domino, [16, 1], 15)
 
     def test_is_valid01(self):
         """Test is_valid method with different number of elements."""
@@ -113,6 +142,295 @@ class TestDominoSet(unittest.TestCase):
         answer = [6, 5]
         self.assertNotEqual(result, answer)
 
+        domino_set = DominoSet(domino_list=[[0, 1], [5, 6]])
+        self.assertIsNone(domino_set.get_largest_domino())
+
+    def test_mask(self):
+        """Test that the mask follows dominoes added and removed."""
+        domino_set = DominoSet(domino_list=[[0, 1], [2, 2]])
+        piece = Domino([5, 6])
+
+        self.assertNotIn(piece, domino_set)
+        domino_set.add_domino(piece)
+        self.assertIn(piece, domino_set)
+        self.assertTrue(domino_set.has_double())
+        self.assertTrue(domino_set.has_number(6))
+        self.assertFalse(domino_set.has_number(3))
+
+        domino_set.remove_domino(piece)
+        self.assertNotIn(piece, domino_set)
+        self.assertFalse(domino_set.has_number(6))
+        self.assertRaises(ValueError, domino_set.remove_domino, piece)
+
+        piece = domino_set.pop_domino()
+        self.assertEqual(piece.numbers, [2, 2])
+        self.assertFalse(domino_set.has_double())
+
+    def test_pip_counts(self):
+        """Test that number counts follow dominoes added and removed."""
+        domino_set = DominoSet(domino_list=[[0, 1], [1, 1]])
+        self.assertEqual(domino_set.pip_counts, [1, 3, 0, 0, 0, 0, 0])
+
+        domino_set.add_domino(Domino([1, 6]))
+        domino_set.remove_domino(Domino([1, 1]))
+        self.assertEqual(domino_set.pip_counts, [1, 2, 0, 0, 0, 0, 1])
+
+        self.assertEqual(DominoSet().pip_counts, [8] * 7)
+
+    def test_get_matching_dominoes(self):
+        """Test get_matching_dominoes method."""
+        domino_set = DominoSet(domino_list=[[0, 1], [1, 1], [2, 3], [1, 6]])
+
+        result = [domino.numbers
+                  for domino in domino_set.get_matching_dominoes(1)]
+        answer = [[0, 1], [1, 1], [1, 6]]
+        self.assertEqual(result, answer)
+        self.assertEqual(domino_set.get_matching_dominoes(4), [])
+
+    def test_double_n(self):
+        """Test full double-N sets and their indexes."""
+        for max_pip, size in ((6, 28), (9, 55), (12, 91), (15, 136)):
+            domino_set = DominoSet(max_pip=max_pip)
+            self.assertEqual(domino_set.get_size(), size)
+            self.assertEqual(domino_set.pip_counts,
+                             [max_pip + 2] * (max_pip + 1))
+            self.assertEqual(len(domino_set.get_matching_dominoes(max_pip)),
+                             max_pip + 1)
+            self.assertEqual(domino_set.get_largest_domino().numbers,
+                             [max_pip, max_pip])
+
+        domino_set = DominoSet([[9, 9], [0, 9]], max_pip=9)
+        self.assertTrue(domino_set.has_number(9))
+        self.assertEqual(domino_set.get_part(1).tile_set.max_pip, 9)
+        self.assertRaises(Exception, DominoSet, [Domino([0, 1])], 9)
+
+
+class TestSnake(unittest.TestCase):
+    """Class for testing Snake class."""
+
+    def test_add_domino(self):
+        """Test that dominoes are oriented to match the snake ends."""
+        snake = Snake()
+        snake.add_domino(Domino([3, 3]), "R")
+        snake.add_domino(Domino([1, 3]), "R")
+        snake.add_domino(Domino([3, 5]), "L")
+        snake.add_domino(Domino([1, 6]), "R")
+
+        answer = [[5, 3], [3, 3], [3, 1], [1, 6]]
+        self.assertEqual(snake.get_domino_values(), answer)
+        self.assertEqual(snake.get_side_number("L"), 5)
+        self.assertEqual(snake.get_side_number("R"), 6)
+        self.assertEqual(str(snake), "[5, 3][3, 3][3, 1][1, 6]")
+        self.assertEqual(Domino([1, 3]).numbers, [1, 3])
+        self.assertEqual((snake.left, snake.right), (5, 6))
+        self.assertEqual(snake.pip_counts, [0, 2, 0, 4, 0, 1, 1])
+
+    def test_str(self):
+        """Test that a long snake is shortened."""
+        snake = Snake()
+        for numbers in [[0, 1], [1, 2], [2, 3], [3, 4], [4, 5], [5, 6]]:
+            snake.add_domino(Domino(numbers), "R")
+        snake.add_domino(Domino([6, 6]), "R")
+
+        self.assertEqual(str(snake), "[0, 1][1, 2][2, 3]...[4, 5][5, 6][6, 6]")
+
+
+def make_game(computer, player, snake, stock=(), status="computer"):
+    """Make a DominoGame with given dominoes and snake (left to right)."""
+    game = DominoGame.__new__(DominoGame)
+    game.computer_set = DominoSet(domino_list=computer)
+    game.player_set = DominoSet(domino_list=player)
+    game.stock_set = DominoSet(domino_list=list(stock))
+    game.snake = Snake()
+    for numbers in snake:
+        game.snake.add_domino(Domino(numbers), "R")
+    game.status = status
+    game.strategy = None
+    game.profiler = None
+    game.max_pip = 6
+    game.hand_size = 7
+    game.passes = 0
+    return game
+
+
+class TestDominoGame(unittest.TestCase):
+    """Class for testing DominoGame class."""
+
+    def test_get_domino_scores(self):
+        """Test that scores count numbers in the hand and the snake."""
+        game = make_game([[0, 1], [1, 5], [2, 2]], [[3, 4]], [[1, 1], [1, 2]])
+
+        scores = game.get_domino_scores()
+        answer = {Domino([0, 1]): 1 + 5, Domino([1, 5]): 5 + 1,
+                  Domino([2, 2]): 3 + 3}
+        self.assertEqual(scores, answer)
+
+    def test_get_computer_command(self):
+        """Test that the computer plays the highest scored legal domino."""
+        game = make_game([[0, 4], [1, 5], [5, 6], [5, 5], [3, 4]], [[2, 3]],
+                         [[4, 4], [4, 5]])
+
+        # [5, 5] has the highest score and fits the right end
+        self.assertEqual(game.get_computer_command(), "4")
+
+        game = make_game([[0, 4], [3, 6]], [[2, 3]], [[4, 4], [4, 5]])
+        self.assertEqual(game.get_computer_command(), "-1")
+
+        game = make_game([[0, 1], [3, 6]], [[2, 3]], [[4, 4], [4, 5]])
+        self.assertEqual(game.get_computer_command(), "0")
+
+    def test_get_legal_moves(self):
+        """Test that only dominoes matching the snake ends are listed."""
+        game = make_game([[0, 4], [1, 5], [5, 6], [4, 5], [2, 3]], [[2, 2]],
+                         [[4, 4], [4, 6]])
+
+        moves = [(domino.numbers, side) for domino, side in
+                 game.get_legal_moves()]
+        answer = [([5, 6], "R"), ([0, 4], "L"), ([4, 5], "L")]
+        self.assertEqual(moves, answer)
+
+        game.status = "player"
+        self.assertEqual(game.get_legal_moves(), [])
+
+    def test_get_strategy_command(self):
+        """Test that an engine strategy chooses like the computer does."""
+        game = make_game([[0, 4], [1, 5], [5, 6], [5, 5], [3, 4]], [[2, 3]],
+                         [[4, 4], [4, 5]], stock=[[1, 2], [0, 0]])
+
+        state = game.get_state()
+        self.assertEqual(state.hands[0], game.computer_set.mask)
+        self.assertEqual(state.stock, [Domino([1, 2]).id, Domino([0, 0]).id])
+        self.assertEqual((state.left, state.right, state.turn), (4, 5, 0))
+        self.assertEqual(game.get_strategy_command(RarityStrategy()),
+                         game.get_computer_command())
+
+        game = make_game([[0, 1], [3, 6]], [[2, 3]], [[4, 4], [4, 5]])
+        self.assertEqual(game.get_strategy_command(RarityStrategy()), "0")
+
+    def test_do_play_game(self):
+        """Test end-game conditions."""
+        snake = [[0, 1], [1, 2], [2, 0], [0, 3], [3, 4], [4, 0], [0, 0],
+                 [0, 5], [5, 6]]
+        game = make_game([[1, 1]], [[2, 2]], snake)
+        self.assertEqual(game.do_play_game(), (True, None))
+
+        # Both ends show 0 which appears 8 times in the snake
+        game = make_game([[1, 1]], [[2, 2]], snake + [[6, 0]])
+        self.assertEqual(game.do_play_game(), (False, "draw"))
+
+        game = make_game([], [[2, 2]], snake)
+        self.assertEqual(game.do_play_game(), (False, "win"))
+
+        game = make_game([[1, 1]], [[2, 2]], snake)
+        game.passes = 2
+        self.assertEqual(game.do_play_game(), (False, "blocked"))
+        self.assertEqual(game.get_winner("blocked"), "computer")
+
+    def test_get_starting_player(self):
+        """Test that the largest double starts the game."""
+        game = make_game([[6, 6], [0, 1]], [[5, 5]], [])
+        self.assertEqual(game.get_starting_player(), "player")
+        self.assertEqual(game.snake.get_domino_values(), [[6, 6]])
+        self.assertEqual(game.computer_set.get_domino_values(), [[0, 1]])
+
+        game = make_game([[4, 4], [0, 1]], [[5, 5], [2, 3]], [])
+        self.assertEqual(game.get_starting_player(), "computer")
+        self.assertEqual(game.player_set.get_domino_values(), [[2, 3]])
+
+        game = make_game([[0, 1]], [[2, 3]], [])
+        self.assertIsNone(game.get_starting_player())
+
+    def test_double_n_game(self):
+        """Test dealing and the draw rule of double-N games."""
+        game = DominoGame(max_pip=12)
+        sizes = [game.computer_set.get_size(), game.player_set.get_size()]
+        self.assertEqual(sorted(sizes), [6, 7])
+        self.assertEqual(game.stock_set.get_size(), 91 - 14)
+        self.assertEqual(game.snake.get_size(), 1)
+        self.assertRaises(ValueError, game.get_state)
+
+        # All 13 dominoes with 0 of the double-12 set, 0 appears 14 times
+        snake = [[0, 0]]
+        for number in range(1, 13, 2):
+            snake += [[0, number], [number, number + 1], [number + 1, 0]]
+        game = make_game([[1, 1]], [[2, 2]], [])
+        game.max_pip = 12
+        game.snake = Snake(12)
+        for numbers in snake[:-1]:
+            game.snake.add_domino(Domino(numbers, 12), "R")
+        self.assertEqual(game.do_play_game(), (True, None))
+        game.snake.add_domino(Domino(snake[-1], 12), "R")
+        self.assertEqual(game.do_play_game(), (False, "draw"))
+
+    @patch("dominoes.deal_tiles")
+    def test_deal(self, deal_tiles):
+        """Test that the dominoes are dealt again when there is no double."""
+        # Dominoes 0, 7, 13, 18, 22, 25 and 27 are the doubles
+        player = [9, 10, 11, 12, 14, 15, 16]
+        stock = [7, 13, 17, 18, 19, 20, 21, 22, 23, 24, 25, 26, 27]
+        deal_tiles.side_effect = [
+            ([[1, 2, 3, 4, 5, 6, 8], player], stock + [0]),
+            ([[0, 1, 2, 3, 4, 5, 6], player], stock + [8]),
+        ]
+        game = DominoGame()
+        self.assertEqual(deal_tiles.call_count, 2)
+        self.assertEqual(game.status, "player")
+        self.assertEqual(game.snake.get_domino_values(), [[0, 0]])
+        self.assertEqual(game.computer_set.get_size(), 6)
+        self.assertEqual(game.stock_set.get_size(), 14)
+
+    def test_play(self):
+        """Test that a game yields its events in order."""
+        game = make_game([[1, 2], [3, 4]], [[5, 6]], [[1, 1]],
+                         stock=[[0, 6]])
+        answer = [
+            DealEvent((Domino([1, 2]), Domino([3, 4])),
+                      (Domino([5, 6]), Domino([1, 1])), 1),
+            StartEvent("player", Domino([1, 1])),
+            MoveEvent("computer", Domino([1, 2]), "R"),
+            DrawEvent("player", Domino([0, 6])),
+            PassEvent("computer"),
+            PassEvent("player"),
+            EndEvent("blocked", "computer"),
+        ]
+        self.assertEqual(list(game.play(lambda game: "0")), answer)
+
+    @patch("builtins.input", return_value="0")
+    def test_play_blocked(self, _):
+        """Test that two passes in a row end the game."""
+        game = make_game([[5, 5]], [[6, 6], [0, 1]], [[2, 2]])
+        events = list(game.play())[2:]
+        answer = [PassEvent("computer"), PassEvent("player"),
+                  EndEvent("blocked", "computer")]
+        self.assertEqual(events, answer)
+
+    def test_play_unattended(self):
+        """Test that a game with a player strategy reads no input."""
+        game = make_game([[1, 2], [3, 4]], [[5, 6]], [[1, 1]],
+                         stock=[[0, 6]])
+        with patch("builtins.input", side_effect=AssertionError), \
+                redirect_stdout(io.StringIO()) as output:
+            events = list(game.play(RarityStrategy()))
+        self.assertEqual(output.getvalue(), "")
+        self.assertIsInstance(events[-1], EndEvent)
+
+        game = make_game([[1, 2], [3, 4]], [[5, 6]], [[1, 1]])
+        self.assertRaises(ValueError, list, game.play(lambda game: "7"))
+
+    @patch("builtins.input", return_value="")
+    def test_print_events(self, mock_input):
+        """Test that the board is printed before every move."""
+        game = make_game([[1, 2]], [[5, 6]], [[1, 1]])
+        output = io.StringIO()
+        with redirect_stdout(output):
+            print_events(game, game.play(), pause=True)
+
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines.count("=" * 70), 1)
+        self.assertEqual(lines[-1], "Status: The game is over. "
+                                    "The computer won!")
+        self.assertEqual(mock_input.call_count, 1)
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -0,0 +1,181 @@
+#! python3
+"""Unit test script for testing the headless domino game engine."""
+import random
+import unittest
+
+from engine import DRAW
+from engine import PASS
+from engine import RandomStrategy
+from engine import RarityStrategy
+from engine import deal
+from engine import get_counts
+from engine import legal_moves
+from engine import make_state
+from engine import play_game
+from tiles import FULL_MASK
+from tiles import TILES
+from tiles import count
+from tiles import tile_id
+from tiles import to_mask
+from zobrist import compute_hash
+
+
+class TestDeal(unittest.TestCase):
+    """Class for testing deal function."""
+
+    def test_deal(self):
+        """Test that the highest double starts and all dominoes are dealt."""
+        state = deal(random.Random(42))
+
+        stock = to_mask(state.stock)
+        self.assertEqual(stock, state.get_stock_mask())
+        self.assertEqual(state.hands[0] | state.hands[1] | stock
+                         | state.played, FULL_MASK)
+        self.assertEqual(state.left, state.right)
+        self.assertEqual(state.snake_counts[state.left], 2)
+
+        double = tile_id(state.left, state.left)
+        self.assertEqual(state.played, 1 << double)
+        for seat in (0, 1):
+            for tile, (a, b) in enumerate(TILES):
+                if state.hands[seat] >> tile & 1 and a == b:
+                    self.assertLess(tile, double)
+        self.assertEqual(count(state.hands[state.turn]), 7)
+        self.assertEqual(count(state.hands[1 - state.turn]), 6)
+
+    def test_deal_deck(self):
+        """Test dealing the dominoes of a given deck in order."""
+        deck = list(range(28))
+        state = deal(random.Random(0), deck)
+        self.assertEqual(state.hands[0], to_mask(deck[:7]))
+        self.assertEqual(state.hands[1] | state.played, to_mask(deck[7:14]))
+        self.assertEqual(state.stock, deck[14:])
+
+        doubles = [tile for tile, (a, b) in enumerate(TILES) if a == b]
+        deck = [tile for tile in range(28) if tile not in doubles] + doubles
+        self.assertRaises(ValueError, deal, random.Random(0), deck)
+
+
+class TestGameState(unittest.TestCase):
+    """Class for testing GameState class."""
+
+    def test_apply_undo(self):
+        """Test that undoing moves restores every previous state."""
+        rng = random.Random(3)
+        for seed in range(20):
+            state = deal(random.Random(seed)).track()
+            keys, moves = [], []
+            while state.get_outcome() is None:
+                self.assertEqual(state.hand_counts,
+                                 [get_counts(hand) for hand in state.hands])
+                keys.append((state.key(), state.snake_counts[:],
+                             [counts[:] for counts in state.hand_counts],
+                             state.stock[:]))
+                move = rng.choice(state.get_moves())
+                moves.append(move)
+                state.apply(move)
+
+            for move in reversed(moves):
+                state.undo(move)
+                self.assertEqual((state.key(), state.snake_counts,
+                                  state.hand_counts, state.stock),
+                                 keys.pop())
+
+    def test_untracked(self):
+        """Test that only tracked states keep a hash and undo moves."""
+        state = deal(random.Random(0))
+        self.assertIsNone(state.zobrist)
+        move = state.get_moves()[0]
+        state.apply(move)
+        self.assertRaises(ValueError, state.undo, move)
+
+        clone = state.clone().track()
+        self.assertEqual(clone.zobrist, compute_hash(clone))
+        self.assertIsNone(state.zobrist)
+
+    def test_get_moves(self):
+        """Test that a seat without placements draws or passes."""
+        state = deal(random.Random(0))
+        state.hands[state.turn] = to_mask([tile_id(0, 1)])
+        state.left = state.right = 5
+        self.assertEqual(state.get_moves(), [DRAW])
+
+        state.stock = []
+        self.assertEqual(state.get_moves(), [PASS])
+        state.apply(PASS)
+        self.assertIsNone(state.get_outcome())
+        state.hands[state.turn] = to_mask([tile_id(6, 6)])
+        state.apply(PASS)
+        self.assertEqual(state.get_outcome(), ("blocked", state.turn))
+
+    def test_clone(self):
+        """Test that a clone is changed independently of the original."""
+        state = deal(random.Random(1))
+        key, stock, counts = state.key(), state.stock[:], state.snake_counts[:]
+        hand_counts = [counts[:] for counts in state.hand_counts]
+
+        clone = state.clone()
+        while clone.get_outcome() is None:
+            clone.apply(clone.get_moves()[0])
+
+        self.assertEqual(state.key(), key)
+        self.assertEqual(state.stock, stock)
+        self.assertEqual(state.snake_counts, counts)
+        self.assertEqual(state.hand_counts, hand_counts)
+        self.assertNotEqual(clone.key(), key)
+
+        state.apply(state.get_moves()[0])
+        self.assertNotEqual(state.key(), key)
+
+
+class TestPlayGame(unittest.TestCase):
+    """Class for testing play_game function."""
+
+    def test_play_game01(self):
+        """Test that a game is reproducible from its seed."""
+        strategies = [RarityStrategy(), RandomStrategy()]
+        for seed in range(50):
+            self.assertEqual(play_game(strategies, seed),
+                             play_game(strategies, seed))
+
+    def test_play_game02(self):
+        """Test that every game ends with a consistent result."""
+        strategies = [RandomStrategy(), RarityStrategy()]
+        for seed in range(200):
+            result = play_game(strategies, seed)
+            self.assertEqual(result.seed, seed)
+            if result.reason == "win":
+                self.assertIn(result.winner, (0, 1))
+                self.assertEqual(result.pips[result.winner], 0)
+            else:
+                self.assertIn(result.reason, ("draw", "blocked"))
+
+    def test_legal_moves(self):
+        """Test that placements matching the snake ends are listed."""
+        state = deal(random.Random(0))
+        hand = [tile_id(0, 1), tile_id(1, 3), tile_id(3, 3), tile_id(5, 6)]
+        state.hands[state.turn] = to_mask(hand)
+
+        state.left, state.right = 1, 3
+        answer = [(hand[1], "R"), (hand[2], "R"), (hand[0], "L"),
+                  (hand[1], "L")]
+        self.assertEqual(legal_moves(state), answer)
+
+        state.left = 3
+        self.assertEqual(legal_moves(state), answer[:2])
+
+        state.left = state.right = 4
+        self.assertEqual(legal_moves(state), [])
+
+    def test_rarity_strategy(self):
+        """Test that the domino with the most common numbers is chosen."""
+        hand = [tile_id(0, 1), tile_id(2, 3), tile_id(3, 3), tile_id(3, 4)]
+        state = make_state([to_mask(hand), 0], [], 1 << tile_id(1, 3), 1, 3,
+                           0)
+        moves = [(hand[1], "R"), (hand[2], "R"), (hand[3], "R"), (hand[0], "L")]
+
+        self.assertEqual(RarityStrategy().choose(state, moves), (hand[2], "R"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
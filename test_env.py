@@ -0,0 +1,93 @@
+#! python3
+"""Unit test script for testing the vectorized environment."""
+import random
+import unittest
+
+import numpy as np
+
+from engine import DRAW
+from engine import RarityStrategy
+from engine import play_game
+from env import ACTION_COUNT, DRAW_ACTION, OBSERVATION_SIZE
+from env import VectorEnv
+from env import to_action
+from tiles import TILE_COUNT
+
+
+class TestVectorEnv(unittest.TestCase):
+    """Class for testing VectorEnv class."""
+
+    def test_masks(self):
+        """Test that observations and masks match the engine states."""
+        env = VectorEnv(16, seed=1)
+        observations, masks = env.reset()
+        self.assertEqual(observations.shape, (16, OBSERVATION_SIZE))
+        self.assertEqual(masks.shape, (16, ACTION_COUNT))
+
+        rng = np.random.default_rng(1)
+        for _ in range(200):
+            for i, state in enumerate(env.states):
+                hand = state.hands[env.seat]
+                self.assertEqual(
+                    list(observations[i, :TILE_COUNT]),
+                    [hand >> tile & 1 for tile in range(TILE_COUNT)])
+                actions = sorted(to_action(move)
+                                 for move in state.get_moves())
+                self.assertEqual(list(np.flatnonzero(masks[i])), actions)
+
+            actions = [rng.choice(np.flatnonzero(mask)) for mask in masks]
+            observations, _, _, masks = env.step(actions)
+        self.assertGreater(env.episodes, 0)
+
+    def test_rewards(self):
+        """Test that games are played like in the engine."""
+        env = VectorEnv(4, seed=7)
+        seeds = random.Random(7)
+        strategy = RarityStrategy()
+        _, masks = env.reset()
+        expected = [play_game([strategy, strategy], seeds.getrandbits(64))
+                    for _ in range(4)]
+
+        rewards = [None] * 4
+        while None in rewards:
+            actions = []
+            for state in env.states:
+                moves = state.get_moves()
+                move = moves[0] if moves[0] == DRAW or len(moves) == 1 \
+                    else strategy.choose(state, moves)
+                actions.append(to_action(move))
+            _, step_rewards, dones, _ = env.step(actions)
+            for i in np.flatnonzero(dones):
+                if rewards[i] is None:
+                    rewards[i] = step_rewards[i]
+
+        answer = [0 if result.winner is None
+                  else (1 if result.winner == 1 else -1)
+                  for result in expected]
+        self.assertEqual(rewards, answer)
+
+    def test_illegal_action(self):
+        """Test that illegal actions are rejected."""
+        env = VectorEnv(1, seed=0)
+        _, masks = env.reset()
+        illegal = int(np.flatnonzero(~masks[0])[0])
+        self.assertRaises(ValueError, env.step, [illegal])
+        self.assertLess(illegal, ACTION_COUNT)
+        self.assertEqual(DRAW_ACTION, ACTION_COUNT - 1)
+
+    def test_illegal_action_in_batch(self):
+        """Test that no game is changed when any action is illegal."""
+        env = VectorEnv(3, seed=1)
+        observations, masks = env.reset()
+        actions = [int(np.flatnonzero(mask)[0]) for mask in masks]
+        actions[1] = int(np.flatnonzero(~masks[1])[0])
+        keys = [state.key() for state in env.states]
+
+        self.assertRaises(ValueError, env.step, actions)
+        self.assertRaises(ValueError, env.step, actions[:2])
+        self.assertEqual([state.key() for state in env.states], keys)
+        self.assertTrue((env.observe()[0] == observations).all())
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,146 @@
+#! python3
+"""Unit test script for testing the Monte Carlo move evaluator."""
+import random
+import time
+import unittest
+
+from engine import RarityStrategy
+from engine import deal
+from engine import play_game
+from montecarlo import MonteCarloEvaluator
+from montecarlo import MonteCarloStrategy
+from montecarlo import get_view
+from montecarlo import sample_state
+from tiles import FULL_MASK
+from tiles import count
+
+
+class SlowStrategy(RarityStrategy):
+    """Rollout policy taking its time."""
+
+    def choose(self, state, moves):
+        time.sleep(0.001)
+        return super().choose(state, moves)
+
+
+class StopAfterTwoTasks(MonteCarloEvaluator):
+    """Evaluator stopping early after two tasks."""
+
+    def is_best_clear(self, scores, deals):
+        return deals >= 2 * self.deals_per_task
+
+
+class TestMonteCarlo(unittest.TestCase):
+    """Class for testing montecarlo module."""
+
+    def setUp(self):
+        self.state = deal(random.Random(3))
+        while len(self.state.get_moves()) < 2:
+            self.state.apply(self.state.get_moves()[0])
+
+    def test_sample_state(self):
+        """Test that sampled deals are consistent with the view."""
+        view = get_view(self.state)
+        rng = random.Random(0)
+        for _ in range(20):
+            state = sample_state(view, rng)
+            self.assertEqual(state.hands[0], view.hand)
+            self.assertEqual(state.turn, 0)
+            self.assertEqual(count(state.hands[1]), view.opponent_size)
+            self.assertEqual(len(state.stock), view.stock_size)
+            self.assertEqual(state.get_stock_mask() | state.hands[0]
+                             | state.hands[1] | state.played, FULL_MASK)
+            self.assertEqual(state.snake_counts, self.state.snake_counts)
+
+    def test_evaluate(self):
+        """Test that evaluations do not depend on the number of workers."""
+        view = get_view(self.state)
+        moves = self.state.get_moves()
+
+        evaluations = []
+        for processes in (1, 2):
+            with MonteCarloEvaluator(processes=processes, time_limit=60,
+                                     max_deals=100, deals_per_task=25,
+                                     confidence=100, seed=1) as evaluator:
+                evaluations.append(evaluator.evaluate(view, moves))
+
+        single, pooled = evaluations
+        self.assertEqual(single.deals, 100)
+        self.assertFalse(single.stopped_early)
+        self.assertEqual(single.win_rates, pooled.win_rates)
+        for rate in single.win_rates:
+            self.assertTrue(0 <= rate <= 1)
+
+    def test_budget(self):
+        """Test that the deal budget is kept and tight budgets give a result."""
+        view = get_view(self.state)
+        moves = self.state.get_moves()
+        for processes in (1, 2):
+            with MonteCarloEvaluator(processes=processes, time_limit=60,
+                                     max_deals=60, deals_per_task=25,
+                                     confidence=100, seed=1) as evaluator:
+                self.assertEqual(evaluator.evaluate(view, moves).deals, 60)
+
+            with MonteCarloEvaluator(processes=processes, time_limit=0,
+                                     seed=1) as evaluator:
+                self.assertGreater(evaluator.evaluate(view, moves).deals, 0)
+
+        self.assertRaises(ValueError, MonteCarloEvaluator, max_deals=0)
+
+    def test_stop_early(self):
+        """Test that early stops do not depend on the number of workers."""
+        view = get_view(self.state)
+        moves = self.state.get_moves()
+
+        evaluations = []
+        for processes in (1, 2, 3):
+            with MonteCarloEvaluator(processes=processes, time_limit=60,
+                                     max_deals=2000, deals_per_task=10,
+                                     confidence=0.5, seed=4) as evaluator:
+                evaluations.append(evaluator.evaluate(view, moves))
+
+        self.assertTrue(evaluations[0].stopped_early)
+        self.assertLess(evaluations[0].deals, 2000)
+        for evaluation in evaluations[1:]:
+            self.assertEqual(evaluation, evaluations[0])
+
+    def test_latency_after_stop(self):
+        """Test that an early stop leaves no work behind in the pool."""
+        view = get_view(self.state)
+        moves = self.state.get_moves()
+        times = []
+        for first_deals in (100000, 16):
+            with StopAfterTwoTasks(processes=2, time_limit=60, seed=1,
+                                   policy=SlowStrategy()) as evaluator:
+                evaluator.max_deals = 1
+                evaluator.evaluate(view, moves)    # start the workers
+                # Only the first run has a task left when it stops early
+                evaluator.max_deals, evaluator.deals_per_task = first_deals, 8
+                self.assertTrue(evaluator.evaluate(view, moves).stopped_early)
+
+                evaluator.max_deals, evaluator.deals_per_task = 100, 2
+                start = time.perf_counter()
+                evaluator.evaluate(view, moves)
+                times.append(time.perf_counter() - start)
+
+        # A task left running would keep a worker busy for the whole time
+        self.assertLess(times[0], times[1] * 1.5)
+
+    def test_is_best_clear(self):
+        """Test the early stopping rule."""
+        evaluator = MonteCarloEvaluator(processes=1)
+        self.assertTrue(evaluator.is_best_clear([90, 10, 20], 100))
+        self.assertFalse(evaluator.is_best_clear([52, 48], 100))
+        self.assertTrue(evaluator.is_best_clear([5], 10))
+
+    def test_strategy(self):
+        """Test that the strategy plays legal moves until the game ends."""
+        evaluator = MonteCarloEvaluator(processes=1, time_limit=0.01,
+                                        max_deals=20, seed=0)
+        result = play_game([MonteCarloStrategy(evaluator), RarityStrategy()],
+                           seed=2)
+        self.assertIn(result.reason, ("win", "draw", "blocked"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,93 @@
+#! python3
+"""Unit test script for testing the game instrumentation."""
+import io
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+from dominoes import DominoGame
+from profiling import Profiler
+from profiling import merge_snapshots
+from test_dominoes import make_game
+
+
+def make_profiled_game(profiler):
+    """Make the game of TestDominoGame.test_play with a profiler."""
+    game = make_game([[1, 2], [3, 4]], [[5, 6]], [[1, 1]], stock=[[0, 6]])
+    game.profiler = profiler
+    profiler.instrument(game)
+    return game
+
+
+class TestProfiler(unittest.TestCase):
+    """Class for testing Profiler class."""
+
+    @patch("builtins.input", side_effect=["ab", "9", "0", "0"])
+    def test_instrument(self, _):
+        """Test that phases and events of a game are measured."""
+        profiler = Profiler()
+        game = make_profiled_game(profiler)
+        with redirect_stdout(io.StringIO()):
+            events = list(game.play())
+        self.assertEqual(events[-1].result, "blocked")
+
+        self.assertEqual(profiler.counters,
+                         {"moves": 1, "draws": 1, "passes": 2,
+                          "illegal_commands": 2})
+        self.assertEqual(profiler.timers["command"][0], 4)
+        self.assertEqual(profiler.timers["move"][0], 4)
+        self.assertEqual(profiler.timers["validation"][0], 4)
+        self.assertEqual(profiler.timers["end_check"][0], 4)
+        self.assertGreater(profiler.timers["scoring"][0], 0)
+        for calls, seconds in profiler.timers.values():
+            self.assertGreaterEqual(seconds, 0)
+
+        # Instrumenting again does not measure twice
+        profiler.instrument(game)
+        game.do_play_game()
+        self.assertEqual(profiler.timers["end_check"][0], 5)
+
+    def test_not_instrumented(self):
+        """Test that games without a profiler keep the plain methods."""
+        profiler = Profiler()
+        make_profiled_game(profiler)
+        self.assertNotIn("make_move", vars(DominoGame()))
+        game = make_game([[1, 2]], [[5, 6]], [[1, 1]])
+        game.do_play_game()
+        self.assertEqual(profiler.timers, {})
+
+    def test_snapshot(self):
+        """Test merging snapshots of profilers."""
+        first, second = Profiler(), Profiler()
+        first.add_time("move", 1.0)
+        first.count("draws")
+        second.add_time("move", 0.5)
+        second.add_time("command", 2.0)
+        second.count("draws", 2)
+
+        merged = merge_snapshots([first.snapshot(), second.snapshot()])
+        self.assertEqual(merged.timers, {"move": [2, 1.5],
+                                         "command": [1, 2.0]})
+        self.assertEqual(merged.counters, {"draws": 3})
+        self.assertIn("draws", str(merged))
+
+        merged.reset()
+        self.assertEqual(merged.snapshot(), {"timers": {}, "counters": {}})
+
+    @patch("dominoes.deal_tiles")
+    def test_game_profiler(self, deal_tiles):
+        """Test that a new game is instrumented by its profiler."""
+        player = [9, 10, 11, 12, 14, 15, 16]
+        stock = [7, 13, 17, 18, 19, 20, 21, 22, 23, 24, 25, 26, 27]
+        deal_tiles.side_effect = [
+            ([[1, 2, 3, 4, 5, 6, 8], player], stock + [0]),
+            ([[0, 1, 2, 3, 4, 5, 6], player], stock + [8]),
+        ]
+        profiler = Profiler()
+        game = DominoGame(profiler=profiler)
+        self.assertIn("make_move", vars(game))
+        self.assertEqual(profiler.counters, {"redeals": 1})
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,121 @@
+#! python3
+"""Unit test script for testing the game record format."""
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from engine import DRAW, PASS
+from engine import RandomStrategy
+from engine import RarityStrategy
+from engine import play_game
+from records import DRAW_CODE, PASS_CODE, RECORD_SIZE
+from records import RecordWriter
+from records import decode_move, encode_move, from_array, pack_record
+from records import read_records, record_game, replay, to_result
+from records import unpack_record
+from tiles import TILE_COUNT
+from tiles import pip_total
+from tournament import run_tournament
+
+
+class TestRecords(unittest.TestCase):
+    """Class for testing records module."""
+
+    def setUp(self):
+        self.strategies = [RarityStrategy(), RandomStrategy()]
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "games.rec")
+
+    def test_move_codes(self):
+        """Test that move codes cover all moves without collisions."""
+        moves = [(tile, side) for tile in range(TILE_COUNT)
+                 for side in ("R", "L")] + [DRAW, PASS]
+        codes = [encode_move(move) for move in moves]
+        self.assertEqual(codes, list(range(PASS_CODE + 1)))
+        self.assertEqual(encode_move(DRAW), DRAW_CODE)
+        for move in moves:
+            self.assertEqual(decode_move(encode_move(move)), move)
+        self.assertRaises(ValueError, decode_move, 255)
+
+    def test_record_game(self):
+        """Test that records match played games and replay to them."""
+        for seed in range(50):
+            record = record_game(self.strategies, seed)
+            self.assertEqual(to_result(record),
+                             play_game(self.strategies, seed))
+            self.assertEqual(len(record.moves), record.turns)
+
+            state = replay(record)
+            self.assertEqual(state.get_outcome(),
+                             (record.reason, record.winner))
+            self.assertEqual(tuple(pip_total(hand) for hand in state.hands),
+                             record.pips)
+
+    def test_pack_record(self):
+        """Test packing a record into bytes and back."""
+        record = record_game(self.strategies, 7)
+        data = pack_record(record)
+        self.assertEqual(len(data), RECORD_SIZE)
+        self.assertEqual(unpack_record(data), record)
+
+    def test_replay_illegal_move(self):
+        """Test that replaying an altered record raises ValueError."""
+        record = record_game(self.strategies, 3)
+        record.moves[0] = PASS
+        self.assertRaises(ValueError, replay, record)
+
+    def test_read_records(self):
+        """Test writing records and memory-mapping them."""
+        records = [record_game(self.strategies, seed) for seed in range(30)]
+        with RecordWriter(self.path, buffer_size=8) as writer:
+            for record in records[:20]:
+                writer.write(record)
+        with RecordWriter(self.path) as writer:
+            for record in records[20:]:
+                writer.write(record)
+
+        games = read_records(self.path)
+        self.assertEqual(len(games), 30)
+        self.assertEqual(list(games["seed"]), list(range(30)))
+        self.assertEqual(list(games["turns"]),
+                         [record.turns for record in records])
+        self.assertEqual([from_array(row) for row in games], records)
+
+    def test_short_writes(self):
+        """Test that records written in pieces stay whole."""
+        records = [record_game(self.strategies, seed) for seed in range(10)]
+        write = os.write
+        with patch("os.write", lambda fd, data: write(fd, data[:50])):
+            with RecordWriter(self.path, buffer_size=4) as writer:
+                for record in records:
+                    writer.write(record)
+        self.assertEqual([from_array(row) for row in read_records(self.path)],
+                         records)
+
+        with patch("os.write", return_value=0):
+            writer = RecordWriter(self.path, buffer_size=4)
+            writer.write(records[0])
+            self.assertRaises(OSError, writer.close)
+        self.assertIsNone(writer._fd)
+
+    def test_invalid_file(self):
+        """Test that other files are not read as records."""
+        with open(self.path, "wb") as file:
+            file.write(b"not a record file")
+        self.assertRaises(ValueError, read_records, self.path)
+        self.assertRaises(ValueError, RecordWriter, self.path)
+
+    def test_tournament_record(self):
+        """Test that tournament workers append the games to a record file."""
+        result = run_tournament(self.strategies, 200, seed=4, processes=2,
+                                chunk_size=30, record=self.path)
+        games = read_records(self.path)
+        self.assertEqual(len(games), 200)
+        self.assertEqual(int((games["winner"] == 0).sum()), result.wins[0])
+        self.assertEqual(int((games["winner"] == -1).sum()), result.draws)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,216 @@
+#! python3
+"""Unit test script for testing search support."""
+import random
+import unittest
+
+from engine import RandomStrategy
+from engine import RarityStrategy
+from engine import deal
+from engine import make_state
+from engine import play_game
+from search import EndgameSolver
+from search import EndgameStrategy
+from search import LOWER
+from search import TranspositionTable
+from tournament import run_tournament
+from zobrist import compute_hash
+
+
+class TestZobrist(unittest.TestCase):
+    """Class for testing incremental position hashes."""
+
+    def test_incremental_hash(self):
+        """Test that apply and undo keep the hash equal to a full rehash."""
+        rng = random.Random(7)
+        for seed in range(20):
+            state = deal(random.Random(seed)).track()
+            moves = []
+            while state.get_outcome() is None:
+                move = rng.choice(state.get_moves())
+                moves.append(move)
+                state.apply(move)
+                self.assertEqual(state.zobrist, compute_hash(state))
+
+            for move in reversed(moves):
+                state.undo(move)
+                self.assertEqual(state.zobrist, compute_hash(state))
+
+    def test_transposition(self):
+        """Test that equal positions and only them hash the same."""
+        seen = {}
+        for seed in range(300):
+            state = deal(random.Random(seed)).track()
+            while state.get_outcome() is None:
+                # Mirrored snakes are the same position
+                key = list(state.key())
+                key[3:5] = sorted(key[3:5])
+                self.assertEqual(seen.setdefault(state.zobrist, key), key)
+                state.apply(state.get_moves()[-1])
+
+
+class TestTranspositionTable(unittest.TestCase):
+    """Class for testing TranspositionTable class."""
+
+    def test_get_put(self):
+        """Test stores, lookups and statistics."""
+        table = TranspositionTable(size=100)
+        self.assertEqual(len(table.slots), 128)
+
+        self.assertIsNone(table.get(5))
+        self.assertTrue(table.put(5, depth=3, value=1, move=(0, "R")))
+        self.assertEqual(table.get(5)[1:5], (3, 1, 0, (0, "R")))
+
+        stats = table.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+        self.assertEqual(stats["used"], 1)
+
+    def test_replacement(self):
+        """Test that deeper entries of the current search are kept."""
+        table = TranspositionTable(size=16)
+        table.put(1, depth=5, value=1)
+
+        # Another position in the same slot searched less deep
+        self.assertFalse(table.put(1 + 16, depth=2, value=0))
+        self.assertEqual(table.get(1)[2], 1)
+
+        # The same position is always updated
+        self.assertTrue(table.put(1, depth=1, value=-1, flag=LOWER))
+        self.assertEqual(table.get(1)[1:4], (1, -1, LOWER))
+
+        # Entries of an earlier search are replaced
+        table.put(1, depth=5, value=1)
+        table.new_search()
+        self.assertTrue(table.put(1 + 16, depth=2, value=0))
+        self.assertIsNone(table.get(1))
+        self.assertEqual(table.get_stats()["replacements"], 1)
+
+        table.clear()
+        self.assertEqual(len(table), 0)
+
+
+def play_until_stock_is_empty(seed):
+    """Play random moves until the stock is empty and the game goes on."""
+    state = deal(random.Random(seed)).track()
+    while state.stock and state.get_outcome() is None:
+        state.apply(state.rng.choice(state.get_moves()))
+    return state if state.get_outcome() is None else None
+
+
+def minimax(state):
+    """Get the value of a position for the seat to move without pruning."""
+    values = []
+    for move in state.get_moves():
+        state.apply(move)
+        outcome = state.get_outcome()
+        if outcome is None:
+            values.append(-minimax(state))
+        elif outcome[1] is None:
+            values.append(0)
+        else:
+            values.append(1 if outcome[1] != state.turn else -1)
+        state.undo(move)
+    return max(values)
+
+
+class TestEndgameSolver(unittest.TestCase):
+    """Class for testing EndgameSolver class."""
+
+    def test_solve(self):
+        """Test that solved values match a full minimax search."""
+        solver = EndgameSolver()
+        solved = 0
+        for seed in range(200):
+            state = play_until_stock_is_empty(seed)
+            if state is None or bin(state.hands[0] | state.hands[1]) \
+                    .count("1") > 10:
+                continue
+
+            key = state.key()
+            value, move = solver.solve(state)
+            self.assertEqual(state.key(), key)    # the state is not changed
+            self.assertEqual(value, minimax(state))
+            self.assertIn(move, state.get_moves())
+
+            state.apply(move)
+            outcome = state.get_outcome()
+            if outcome is None:
+                self.assertEqual(-minimax(state), value)
+            solved += 1
+        self.assertGreater(solved, 10)
+
+    def test_mirrored_snake(self):
+        """Test that a mirrored snake, which hashes the same, gets its own
+        legal move."""
+        solver = EndgameSolver()
+        mirrored = 0
+        for seed in range(100):
+            state = play_until_stock_is_empty(seed)
+            if state is None or state.left == state.right \
+                    or state.passes or len(state.get_moves()) < 2:
+                continue
+
+            mirror = make_state(state.hands, state.stock, state.played,
+                                state.right, state.left, state.turn)
+            self.assertEqual(compute_hash(mirror), compute_hash(state))
+            value, (tile, side) = solver.solve(state)
+            side = "L" if side == "R" else "R"
+            self.assertEqual(solver.solve(mirror), (value, (tile, side)))
+            mirrored += 1
+        self.assertGreater(mirrored, 5)
+
+    def test_earlier_searches(self):
+        """Test that results do not depend on earlier searches."""
+        states = [play_until_stock_is_empty(seed) for seed in range(60)]
+        states = [state for state in states if state is not None]
+        warm = EndgameSolver(max_nodes=200)
+        warm_results = [warm.solve(state) for state in states]
+        cold_results = [EndgameSolver(max_nodes=200).solve(state)
+                        for state in states]
+        self.assertEqual(warm_results, cold_results)
+        self.assertIn(None, cold_results)
+
+    def test_budget(self):
+        """Test that a search out of its budget gives no result."""
+        state = None
+        seed = 0
+        while state is None:
+            state = play_until_stock_is_empty(seed)
+            seed += 1
+
+        self.assertIsNone(EndgameSolver(max_nodes=1).solve(state))
+        self.assertRaises(ValueError, EndgameSolver().solve, deal(
+            random.Random(0)))
+
+
+class TestEndgameStrategy(unittest.TestCase):
+    """Class for testing EndgameStrategy class."""
+
+    def test_play_game(self):
+        """Test that perfect endgames do not lose to the same heuristic."""
+        results = [0, 0]
+        for seed in range(200):
+            for seat in (0, 1):
+                strategies = [RarityStrategy(), RarityStrategy()]
+                strategies[seat] = EndgameStrategy(fallback=RarityStrategy())
+                result = play_game(strategies, seed)
+                if result.winner is not None:
+                    results[result.winner == seat] += 1
+        self.assertGreater(results[1], results[0])
+
+        result = play_game([EndgameStrategy(), RandomStrategy()], 1)
+        self.assertIn(result.reason, ("win", "draw", "blocked"))
+
+    def test_tournament(self):
+        """Test that tournament results do not depend on the workers."""
+        strategies = [EndgameStrategy(max_nodes=5000), RarityStrategy()]
+        single = run_tournament(strategies, 200, seed=3, processes=1,
+                                chunk_size=200)
+        pooled = run_tournament(strategies, 200, seed=3, processes=2,
+                                chunk_size=7)
+        for name in ("wins", "draws", "pips", "reasons"):
+            self.assertEqual(getattr(single, name), getattr(pooled, name))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,129 @@
+#! python3
+"""Unit test script for testing the game server."""
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from server import GameServer
+from test_dominoes import make_game
+
+
+async def read_answer(reader):
+    """Read a message of the server: a board up to its status or a line."""
+    lines = [(await reader.readline()).decode().rstrip("\n")]
+    if lines[0].startswith("="):
+        while not lines[-1].startswith("Status:"):
+            lines.append((await reader.readline()).decode().rstrip("\n"))
+    return lines
+
+
+def make_blocked_game():
+    """Make a game blocked after the player places [1, 2] - command '2'."""
+    return make_game([[3, 4], [5, 5]], [[5, 6], [1, 2]], [[1, 1]],
+                     status="player")
+
+
+class TestGameServer(unittest.IsolatedAsyncioTestCase):
+    """Class for testing GameServer class."""
+
+    async def asyncSetUp(self):
+        self.server = GameServer(port=0, idle_timeout=5,
+                                 game_factory=make_blocked_game)
+        await self.server.start()
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def connect(self):
+        reader, writer = await asyncio.open_connection("127.0.0.1",
+                                                       self.server.port)
+        self.addCleanup(writer.close)
+        return reader, writer
+
+    async def test_play(self):
+        """Test playing a game with invalid and valid commands."""
+        reader, writer = await self.connect()
+        board = await read_answer(reader)
+        self.assertEqual(board[-1], "Status: It's your turn to make a move. "
+                                    "Enter your command.")
+        self.assertIn("2:[1, 2]", board)
+
+        for command, answer in [("ab", "Could not process"),
+                                ("7", "Invalid input. Please enter"),
+                                ("-1", "Illegal move.")]:
+            writer.write(f"{command}\n".encode())
+            self.assertTrue((await read_answer(reader))[0].startswith(answer))
+
+        # The computer can not move and passes
+        writer.write(b"2\n")
+        board = await read_answer(reader)
+        self.assertIn("[1, 1][1, 2]", board)
+        self.assertIn("Computer dominoes: 2", board)
+
+        writer.write(b"0\n")
+        self.assertEqual(await read_answer(reader),
+                         ["Status: The game is over. You won!"])
+        self.assertEqual(await reader.readline(), b"")
+        self.assertEqual(self.server.finished, 1)
+        self.assertEqual(self.server.get_stats()["active"], 0)
+
+    async def test_concurrent_sessions(self):
+        """Test that sessions are independent and measured."""
+        clients = [await self.connect() for _ in range(50)]
+        for reader, _ in clients:
+            await read_answer(reader)
+
+        stats = self.server.get_stats()
+        self.assertEqual(stats["active"], 50)
+        self.assertEqual(len({session["id"] for session in stats["sessions"]}),
+                         50)
+
+        for _, writer in clients[:25]:
+            writer.write(b"1\n")
+        for reader, _ in clients[:25]:
+            await read_answer(reader)
+        sessions = self.server.sessions.values()
+        self.assertEqual(sum(session.commands for session in sessions), 25)
+        self.assertGreater(max(session.max_latency for session in sessions),
+                           0)
+
+        for _, writer in clients:
+            writer.write(b"quit\n")
+        for reader, _ in clients:
+            self.assertEqual(await reader.readline(), b"")
+        self.assertEqual(self.server.get_stats()["active"], 0)
+
+    async def test_idle_eviction(self):
+        """Test that idle sessions are closed."""
+        self.server.idle_timeout = 0.05
+        reader, _ = await self.connect()
+        await read_answer(reader)
+        self.assertEqual(await read_answer(reader),
+                         ["Session closed due to inactivity."])
+        self.assertEqual(await reader.readline(), b"")
+        self.assertEqual(self.server.evicted, 1)
+
+
+    async def test_wait_closed(self):
+        """Test that sessions wait until their connections are closed."""
+        closed = []
+        wait_closed = asyncio.StreamWriter.wait_closed
+
+        async def record(writer):
+            await wait_closed(writer)
+            closed.append(writer.transport.is_closing())
+
+        with patch.object(asyncio.StreamWriter, "wait_closed", record):
+            reader, writer = await self.connect()
+            await read_answer(reader)
+            writer.write(b"quit\n")
+            self.assertEqual(await reader.readline(), b"")
+            for _ in range(100):
+                if closed:
+                    break
+                await asyncio.sleep(0.01)
+        self.assertEqual(closed, [True])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,90 @@
+#! python3
+"""Unit test script for testing the bitmask domino representation."""
+import random
+import unittest
+
+from tiles import DOUBLES_MASK
+from tiles import FULL_MASK
+from tiles import PIP_MASKS
+from tiles import TILES
+from tiles import count
+from tiles import deal_tiles
+from tiles import find_starter
+from tiles import get_tile_set
+from tiles import iter_tiles
+from tiles import largest_double
+from tiles import pip_total
+from tiles import tile_id
+from tiles import to_mask
+
+
+class TestTiles(unittest.TestCase):
+    """Class for testing tiles module."""
+
+    def test_tile_id(self):
+        """Test that both orientations map to the same id."""
+        self.assertEqual(len(TILES), 28)
+        for tile, (a, b) in enumerate(TILES):
+            self.assertEqual(tile_id(a, b), tile)
+            self.assertEqual(tile_id(b, a), tile)
+
+    def test_masks(self):
+        """Test the precomputed masks."""
+        self.assertEqual(count(FULL_MASK), 28)
+        self.assertEqual(count(DOUBLES_MASK), 7)
+        for pip, mask in enumerate(PIP_MASKS):
+            self.assertEqual(count(mask), 7)
+            for tile in iter_tiles(mask):
+                self.assertIn(pip, TILES[tile])
+
+    def test_mask_functions(self):
+        """Test conversion and query functions."""
+        tiles = [tile_id(0, 1), tile_id(3, 3), tile_id(5, 5), tile_id(2, 6)]
+        mask = to_mask(tiles)
+
+        self.assertEqual(list(iter_tiles(mask)), sorted(tiles))
+        self.assertEqual(count(mask), 4)
+        self.assertEqual(largest_double(mask), tile_id(5, 5))
+        self.assertIsNone(largest_double(to_mask(tiles[:1])))
+        self.assertEqual(pip_total(mask), 1 + 6 + 10 + 8)
+
+    def test_get_tile_set(self):
+        """Test tile sets of double-N sets."""
+        standard = get_tile_set(6)
+        self.assertEqual((standard.tiles, standard.doubles_mask),
+                         (TILES, DOUBLES_MASK))
+        self.assertIs(get_tile_set(12), get_tile_set(12))
+        for max_pip, size in ((9, 55), (12, 91), (15, 136)):
+            tile_set = get_tile_set(max_pip)
+            self.assertEqual(tile_set.count, size)
+            self.assertEqual(count(tile_set.doubles_mask), max_pip + 1)
+            self.assertEqual(largest_double(tile_set.full_mask,
+                                            tile_set.doubles_mask),
+                             size - 1)
+            for pip, mask in enumerate(tile_set.pip_masks):
+                self.assertEqual(count(mask), max_pip + 1)
+            hands, stock = deal_tiles(random.Random(0), 4, 12, size)
+            self.assertEqual(sorted(sum(hands, stock)), list(range(size)))
+
+    def test_deal_tiles(self):
+        """Test dealing hands to 2-4 seats."""
+        rng = random.Random(0)
+        for seats in (2, 3, 4):
+            hands, stock = deal_tiles(rng, seats)
+            self.assertEqual([len(hand) for hand in hands], [7] * seats)
+            self.assertEqual(len(stock), 28 - 7 * seats)
+            self.assertEqual(sorted(sum(hands, stock)), list(range(28)))
+        self.assertRaises(ValueError, deal_tiles, rng, 5)
+
+    def test_find_starter(self):
+        """Test finding the seat with the largest double."""
+        masks = [to_mask([tile_id(3, 3), tile_id(0, 6)]),
+                 to_mask([tile_id(1, 1)]),
+                 to_mask([tile_id(4, 4), tile_id(6, 5)])]
+        self.assertEqual(find_starter(masks), (2, tile_id(4, 4)))
+        self.assertEqual(find_starter(masks[:2]), (0, tile_id(3, 3)))
+        self.assertIsNone(find_starter([to_mask([tile_id(0, 1)]), 0]))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
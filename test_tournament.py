@@ -0,0 +1,83 @@
+#! python3
+"""Unit test script for testing the tournament runner."""
+import os
+import tempfile
+import time
+import unittest
+
+from cache import EvaluationCache
+from engine import RandomStrategy
+from engine import RarityStrategy
+from search import EndgameStrategy
+from tournament import TournamentResult
+from tournament import derive_seed
+from tournament import play_chunk
+from tournament import replay
+from tournament import run_tournament
+
+
+class TestTournament(unittest.TestCase):
+    """Class for testing tournament module."""
+
+    def setUp(self):
+        self.strategies = [RarityStrategy(), RandomStrategy()]
+
+    def test_derive_seed(self):
+        """Test that game seeds are reproducible and distinct."""
+        self.assertEqual(derive_seed(42, 7), derive_seed(42, 7))
+        seeds = {derive_seed(42, i) for i in range(1000)}
+        self.assertEqual(len(seeds), 1000)
+        self.assertNotEqual(derive_seed(42, 0), derive_seed(43, 0))
+
+    def test_run_tournament(self):
+        """Test that results do not depend on workers and chunks."""
+        single = run_tournament(self.strategies, 300, seed=5, processes=1,
+                                chunk_size=300)
+        pooled = run_tournament(self.strategies, 300, seed=5, processes=2,
+                                chunk_size=7)
+
+        self.assertEqual(single.games, 300)
+        self.assertEqual(sum(single.wins) + single.draws, 300)
+        for name in ("games", "wins", "draws", "pips", "reasons"):
+            self.assertEqual(getattr(single, name), getattr(pooled, name))
+
+    def test_cache_stats(self):
+        """Test that workers report and flush their cache counts."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        cache = EvaluationCache(os.path.join(directory.name, "cache.db"))
+        self.addCleanup(cache.close)
+        strategies = [EndgameStrategy(cache=cache), RarityStrategy()]
+
+        first = run_tournament(strategies, 40, seed=5, processes=2,
+                               chunk_size=10)
+        self.assertGreater(first.cache["stores"], 0)
+        self.assertEqual(first.cache["stores"], len(cache))
+        self.assertIn("Cache hits:", str(first))
+
+        start = time.time()
+        second = run_tournament(strategies, 40, seed=5, processes=2,
+                                chunk_size=10)
+        self.assertEqual(second.cache["stores"], 0)
+        self.assertEqual(second.cache["hits"],
+                         first.cache["hits"] + first.cache["misses"])
+        self.assertEqual(cache.hits, 0)    # counted in the workers
+        # The workers wrote the times of use of their hits
+        self.assertEqual(cache._connect().execute(
+            "SELECT COUNT(*) FROM entries WHERE used < ?",
+            (start,)).fetchone()[0], 0)
+
+    def test_replay(self):
+        """Test that a single game can be replayed from its index."""
+        chunk = play_chunk(self.strategies, 5, 11, 12)
+        expected = TournamentResult()
+        expected.add(replay(self.strategies, 5, 11))
+
+        self.assertEqual(chunk.wins, expected.wins)
+        self.assertEqual(chunk.pips, expected.pips)
+        self.assertEqual(replay(self.strategies, 5, 11).seed,
+                         derive_seed(5, 11))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,157 @@
+#! python3
+"""Compact bitmask representation of domino sets.
+
+Every domino has a fixed id - its position in TILES, ordered as [0, 0],
+[0, 1], ..., [0, 6], [1, 1], ..., [6, 6]. A collection of dominoes (a hand,
+the stock or the snake) is an integer whose bit 'id' is set when the domino
+is in the collection, so membership, removal, "has a double" and "which
+dominoes hold number p" are single bit operations:
+
+    mask & (1 << tile)          membership
+    mask & ~(1 << tile)         removal
+    mask & DOUBLES_MASK         doubles
+    mask & PIP_MASKS[p]         dominoes that hold number p
+
+The module constants describe the standard double-six set. Larger double-N
+sets (double-9 has 55 dominoes, double-12 91 and double-15 136) are numbered
+the same way and described by get_tile_set(N).
+"""
+from collections import namedtuple
+
+TileSet = namedtuple("TileSet", ["max_pip", "tiles", "count", "pips", "ids",
+                                 "full_mask", "doubles_mask", "pip_masks"])
+TileSet.__doc__ = """Tiles and masks of a double-N domino set.
+
+max_pip - the highest number N,
+tiles - (a, b) numbers of every domino id,
+count - number of dominoes,
+pips - sum of numbers of every domino id,
+ids - domino ids of (a, b) and (b, a) pairs,
+full_mask - mask of the whole set,
+doubles_mask - mask of the doubles,
+pip_masks - masks of dominoes holding every number.
+"""
+
+_tile_sets = {}
+
+
+def get_tile_set(max_pip):
+    """Get the TileSet of the double-'max_pip' set (built once)."""
+    tile_set = _tile_sets.get(max_pip)
+    if tile_set is None:
+        tiles = tuple((i, j) for i in range(max_pip + 1)
+                      for j in range(i, max_pip + 1))
+        tile_set = TileSet(
+            max_pip, tiles, len(tiles), tuple(a + b for a, b in tiles),
+            {pair: i for i, tile in enumerate(tiles)
+             for pair in (tile, tile[::-1])},
+            (1 << len(tiles)) - 1,
+            sum(1 << i for i, (a, b) in enumerate(tiles) if a == b),
+            tuple(sum(1 << i for i, tile in enumerate(tiles) if pip in tile)
+                  for pip in range(max_pip + 1)))
+        _tile_sets[max_pip] = tile_set
+    return tile_set
+
+
+MAX_PIP = 6
+STANDARD = get_tile_set(MAX_PIP)
+
+TILES = STANDARD.tiles
+TILE_COUNT = STANDARD.count
+TILE_PIPS = STANDARD.pips
+TILE_IDS = STANDARD.ids
+
+FULL_MASK = STANDARD.full_mask
+DOUBLES_MASK = STANDARD.doubles_mask
+PIP_MASKS = STANDARD.pip_masks
+
+
+def tile_id(a, b):
+    """Get the id of a domino given its numbers in any order."""
+    return TILE_IDS[a, b]
+
+
+def to_mask(tiles):
+    """Get a mask of an iterable of domino ids."""
+    mask = 0
+    for tile in tiles:
+        mask |= 1 << tile
+    return mask
+
+
+def iter_tiles(mask):
+    """Yield domino ids present in the mask in increasing order."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def count(mask):
+    """Get the number of dominoes in the mask."""
+    return mask.bit_count()
+
+
+def largest_double(mask, doubles_mask=DOUBLES_MASK):
+    """Get the id of the largest double domino in the mask or None."""
+    doubles = mask & doubles_mask
+    if not doubles:
+        return None
+    return doubles.bit_length() - 1
+
+
+def pip_total(mask):
+    """Get the sum of numbers on all dominoes in the mask."""
+    return sum(TILE_PIPS[tile] for tile in iter_tiles(mask))
+
+
+def deal_tiles(rng, seats=2, hand_size=7, tile_count=TILE_COUNT):
+    """Shuffle the domino ids once and deal hands to the seats.
+
+    Arguments:
+        rng(random.Random): random number generator (or the random module);
+        seats(int): number of seats, 2 to 4 for 7 dominoes per hand;
+        hand_size(int): number of dominoes dealt to every seat;
+        tile_count(int): number of dominoes in the set.
+
+    Returns:
+        tuple: list of hands (lists of domino ids in dealing order) and the
+            stock (list of the remaining domino ids).
+
+    Raises:
+        ValueError: when the hands need more dominoes than there are;
+    """
+    if seats * hand_size > tile_count:
+        msg = f"Can not deal {hand_size} dominoes to {seats} seats."
+        raise ValueError(msg)
+
+    tiles = list(range(tile_count))
+    rng.shuffle(tiles)
+    hands = [tiles[seat * hand_size:(seat + 1) * hand_size]
+             for seat in range(seats)]
+    return hands, tiles[seats * hand_size:]
+
+
+def find_starter(masks, doubles_mask=DOUBLES_MASK):
+    """Find the seat holding the largest double.
+
+    Arguments:
+        masks(sequence): masks of the hands of the seats;
+        doubles_mask(int): mask of the doubles of the set.
+
+    Returns:
+        tuple: (seat, tile) of the largest double or None when no seat holds
+            a double.
+    """
+    starter = None
+    best = 0
+    for seat, mask in enumerate(masks):
+        # Doubles are ordered by their numbers, so the highest bit is the
+        # largest double
+        doubles = mask & doubles_mask
+        if doubles > best:
+            best = doubles
+            starter = seat
+    if starter is None:
+        return None
+    return starter, best.bit_length() - 1
@@ -0,0 +1,228 @@
+#! python3
+"""Multiprocess tournament runner for headless domino games.
+
+Game 'i' of a tournament started with seed 's' is always played with seed
+derive_seed(s, i), so the results do not depend on the number of worker
+processes or on the order in which the games are scheduled, and any single
+game can be replayed from the tournament seed and its index.
+
+Usage:
+    python tournament.py --games 100000 --seed 42 rarity random
+    python tournament.py --games 100000 --record games.rec rarity random
+"""
+import argparse
+import hashlib
+import multiprocessing
+from collections import Counter
+
+from cache import EvaluationCache
+from engine import STRATEGIES as ENGINE_STRATEGIES
+from engine import play_game
+from records import RecordWriter
+from records import record_game, to_result
+from search import EndgameStrategy
+
+STRATEGIES = dict(ENGINE_STRATEGIES, endgame=EndgameStrategy)
+CACHE_COUNTS = ("hits", "misses", "stores", "evictions")
+
+
+def derive_seed(seed, index):
+    """Derive an independent 64-bit seed of a game from the tournament seed."""
+    digest = hashlib.blake2b(f"{seed}:{index}".encode(), digest_size=8)
+    return int.from_bytes(digest.digest(), "little")
+
+
+class TournamentResult:
+    """Aggregated results of tournament games.
+
+    games - number of games played,
+    wins - number of games won by each seat,
+    draws - number of games without a winner,
+    pips - pip totals left in the hands of each seat,
+    reasons - number of games per end reason,
+    cache - CACHE_COUNTS of the evaluation caches of the strategies.
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.wins = [0, 0]
+        self.draws = 0
+        self.pips = [0, 0]
+        self.reasons = Counter()
+        self.cache = Counter()
+
+    def __str__(self):
+        """Print a summary of the results."""
+        if not self.games:
+            return "No games played."
+
+        lines = [f"Games: {self.games}"]
+        for seat in (0, 1):
+            lines.append(f"Seat {seat} wins: {self.wins[seat]} "
+                         f"({self.wins[seat] / self.games:.2%}), "
+                         f"average pips left: "
+                         f"{self.pips[seat] / self.games:.2f}")
+        lines.append(f"Draws: {self.draws} ({self.draws / self.games:.2%})")
+        lookups = self.cache["hits"] + self.cache["misses"]
+        if lookups:
+            lines.append(f"Cache hits: {self.cache['hits']} of {lookups} "
+                         f"({self.cache['hits'] / lookups:.2%}), "
+                         f"stores: {self.cache['stores']}, "
+                         f"evictions: {self.cache['evictions']}")
+        return "\n".join(lines)
+
+    def add(self, result):
+        """Add a GameResult to the aggregate."""
+        self.games += 1
+        if result.winner is None:
+            self.draws += 1
+        else:
+            self.wins[result.winner] += 1
+        self.pips[0] += result.pips[0]
+        self.pips[1] += result.pips[1]
+        self.reasons[result.reason] += 1
+
+    def merge(self, other):
+        """Merge another TournamentResult into this one."""
+        self.games += other.games
+        self.draws += other.draws
+        for seat in (0, 1):
+            self.wins[seat] += other.wins[seat]
+            self.pips[seat] += other.pips[seat]
+        self.reasons.update(other.reasons)
+        self.cache.update(other.cache)
+
+
+def get_caches(strategies):
+    """Get the distinct evaluation caches of strategies."""
+    caches = {}
+    for strategy in strategies:
+        cache = getattr(strategy, "cache", None)
+        if cache is not None:
+            caches[id(cache)] = cache
+    return list(caches.values())
+
+
+def play_chunk(strategies, seed, start, stop, record=None):
+    """Play games with indices from 'start' to 'stop' and aggregate them.
+
+    When 'record' is a path, the games are also appended to that record file
+    (see records module) with a single write. Evaluation caches of the
+    strategies are flushed at the end, as pool workers never close them,
+    and their counts for the chunk are added to the results.
+    """
+    chunk = TournamentResult()
+    caches = get_caches(strategies)
+    counts = [[getattr(cache, name) for name in CACHE_COUNTS]
+              for cache in caches]
+    if record is None:
+        for index in range(start, stop):
+            chunk.add(play_game(strategies, derive_seed(seed, index)))
+    else:
+        with RecordWriter(record, buffer_size=stop - start) as writer:
+            for index in range(start, stop):
+                game = record_game(strategies, derive_seed(seed, index))
+                writer.write(game)
+                chunk.add(to_result(game))
+
+    for cache, before in zip(caches, counts):
+        cache.flush()
+        for name, count in zip(CACHE_COUNTS, before):
+            chunk.cache[name] += getattr(cache, name) - count
+    return chunk
+
+
+def _play_chunk(args):
+    """Unpack pool task arguments for play_chunk."""
+    return play_chunk(*args)
+
+
+def iter_tournament(strategies, games, seed=0, processes=None,
+                    chunk_size=1000, record=None):
+    """Play tournament games and yield results of chunks as they finish.
+
+    Arguments:
+        strategies(sequence): picklable Strategy objects for seat 0 and 1;
+        games(int): number of games to play;
+        seed: tournament seed (default 0);
+        processes(int): number of worker processes, all cores by default;
+            1 plays the games in the current process;
+        chunk_size(int): number of games sent to a worker at once;
+        record(str): path of a record file the games are appended to
+            (default None - no records).
+
+    Yields:
+        TournamentResult: aggregated results of a chunk of games.
+    """
+    tasks = [(strategies, seed, start, min(start + chunk_size, games),
+              record)
+             for start in range(0, games, chunk_size)]
+    if record is not None:
+        # Create the file with its header before the workers append to it
+        RecordWriter(record).close()
+
+    if processes == 1:
+        for task in tasks:
+            yield _play_chunk(task)
+        return
+
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap_unordered(_play_chunk, tasks)
+
+
+def run_tournament(strategies, games, seed=0, processes=None,
+                   chunk_size=1000, record=None):
+    """Play tournament games and aggregate their results.
+
+    Arguments are the same as in iter_tournament function.
+
+    Returns:
+        TournamentResult: aggregated results of all games.
+    """
+    result = TournamentResult()
+    for chunk in iter_tournament(strategies, games, seed, processes,
+                                 chunk_size, record):
+        result.merge(chunk)
+    return result
+
+
+def replay(strategies, seed, index):
+    """Replay a single tournament game.
+
+    Returns:
+        GameResult: the outcome of game 'index' of tournament 'seed'.
+    """
+    return play_game(strategies, derive_seed(seed, index))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("strategies", nargs=2, choices=sorted(STRATEGIES),
+                        help="strategies of seat 0 and seat 1")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--record", metavar="PATH",
+                        help="append the games to a record file")
+    parser.add_argument("--replay", type=int, metavar="INDEX",
+                        help="replay a single game instead")
+    parser.add_argument("--cache", metavar="PATH",
+                        help="keep endgame solutions in a persistent cache")
+    args = parser.parse_args()
+
+    strategies = [STRATEGIES[name]() for name in args.strategies]
+    if args.cache is not None:
+        cache = EvaluationCache(args.cache)
+        for strategy in strategies:
+            if hasattr(strategy, "cache"):
+                strategy.cache = cache
+    if args.replay is not None:
+        print(replay(strategies, args.seed, args.replay))
+    else:
+        print(run_tournament(strategies, args.games, args.seed,
+                             args.processes, args.chunk_size, args.record))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#! python3
+"""Zobrist keys for incremental 64-bit hashing of engine game states.
+
+A position hash is the XOR of:
+- HAND_KEYS[seat][tile] for every domino in the hand of each seat,
+- SNAKE_KEYS[tile] for every domino in the snake,
+- END_KEYS[left][right] for the numbers on the ends of the snake; the keys
+  are symmetric, so mirrored snakes hash the same,
+- TURN_KEY when seat 1 is to move,
+- PASS_KEYS[passes] for the number of passes in a row.
+
+Dominoes in none of the hands and not in the snake are in the stock, so
+a domino leaving the stock only adds its hand key. Every move changes a few
+of these terms, so GameState.apply and undo update the hash with a few XORs.
+The keys are generated from a fixed seed and are the same in every process.
+"""
+import random
+
+from tiles import MAX_PIP, TILE_COUNT
+from tiles import iter_tiles
+
+_rng = random.Random(0x5EED)
+
+HAND_KEYS = tuple(tuple(_rng.getrandbits(64) for _ in range(TILE_COUNT))
+                  for _ in range(2))
+SNAKE_KEYS = tuple(_rng.getrandbits(64) for _ in range(TILE_COUNT))
+_pair_keys = {(left, right): _rng.getrandbits(64)
+              for left in range(MAX_PIP + 1)
+              for right in range(left, MAX_PIP + 1)}
+END_KEYS = tuple(tuple(_pair_keys[min(left, right), max(left, right)]
+                       for right in range(MAX_PIP + 1))
+                 for left in range(MAX_PIP + 1))
+TURN_KEY = _rng.getrandbits(64)
+PASS_KEYS = (0, _rng.getrandbits(64), _rng.getrandbits(64))
+
+
+def compute_hash(state):
+    """Compute the hash of a GameState from scratch."""
+    key = 0
+    for seat in (0, 1):
+        for tile in iter_tiles(state.hands[seat]):
+            key ^= HAND_KEYS[seat][tile]
+    for tile in iter_tiles(state.played):
+        key ^= SNAKE_KEYS[tile]
+    if state.left is not None:
+        key ^= END_KEYS[state.left][state.right]
+    if state.turn:
+        key ^= TURN_KEY
+    return key ^ PASS_KEYS[state.passes]